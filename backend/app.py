@@ -1,11 +1,20 @@
 import os
-from flask import Flask
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from models import db, bcrypt, User
 from config import Config
+from utils.upload_pipeline import UploadRequest
+from utils.password_hasher import PasswordHasherBusy
+from utils.token_revocation import get_revocation_list
+from utils.query_stats import init_query_stats
+from utils.metrics import init_metrics
+from utils.query_plans import init_query_plan_check
+from utils.sqlite_profile import init_sqlite_profile
+from utils.db_routing import configure_database, init_replica_fallback
 
 from controllers.auth_controller import auth_bp
 from controllers.file_controller import file_bp
@@ -14,19 +23,37 @@ from controllers.user_controller import user_bp
 def create_app(config_class=Config):
     app = Flask(__name__, static_folder='static')
     app.config.from_object(config_class)
+    # Stream multipart uploads straight to the upload folder
+    app.request_class = UploadRequest
+    if app.config['TRUSTED_PROXY_COUNT']:
+        # Client address, scheme and host as seen by the outermost proxy
+        proxies = app.config['TRUSTED_PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
     
     # Initialize extensions
+    configure_database(app)
     db.init_app(app)
+    init_sqlite_profile(app)
+    init_replica_fallback(app)
     bcrypt.init_app(app)
     jwt = JWTManager(app)
     migrate = Migrate(app, db)
+    init_query_stats(app)
+    init_metrics(app)
+    init_query_plan_check(app)
+
+    @jwt.token_in_blocklist_loader
+    def is_token_revoked(jwt_header, jwt_payload):
+        return get_revocation_list().is_revoked(jwt_payload['jti'])
     
     # Configure CORS to accept requests from frontend with credentials
     CORS(app, 
          origins=["http://localhost:8080"],  # Port du frontend
          supports_credentials=True,
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-         allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"])
+         allow_headers=["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With",
+                        "Range", "If-Range", "If-None-Match", "If-Modified-Since"],
+         expose_headers=["Content-Range", "Content-Disposition", "ETag", "Last-Modified", "Accept-Ranges"])
     
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -40,11 +67,18 @@ def create_app(config_class=Config):
     def health_check():
         return {'status': 'healthy'}, 200
 
+    @app.errorhandler(PasswordHasherBusy)
+    def password_hasher_busy(error):
+        response = jsonify({'message': error.description})
+        response.status_code = error.code
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response
+
     @app.after_request
     def after_request(response):
         response.headers["Access-Control-Allow-Origin"] = "http://localhost:8080"
         response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.headers["Access-Control-Allow-Headers"] = "Content-Type,Authorization"
+        response.headers["Access-Control-Allow-Headers"] = "Content-Type,Authorization,Range,If-Range,If-None-Match,If-Modified-Since"
         response.headers["Access-Control-Allow-Methods"] = "GET,PUT,POST,DELETE,OPTIONS"
         return response
     
@@ -0,0 +1,330 @@
+"""
+Load test for the core endpoints.
+
+Drives register/login, file listing, uploads of several sizes, downloads,
+share/revoke and user search at a fixed concurrency, then reports latency
+percentiles, throughput and SQL queries per request, and saves the run as
+JSON so releases can be compared.
+
+    # Start a throwaway app (temporary SQLite database and upload folder)
+    python benchmarks/benchmark.py --local
+
+    # Local Postgres stand-in, more load, compared with an earlier run
+    python benchmarks/benchmark.py --local --database-uri postgresql://localhost/ff_bench \\
+        --concurrency 32 --requests 500 --compare benchmarks/results/previous.json
+
+    # Read-only endpoints on a streaming standby of that database (e.g. a
+    # second local instance on port 5433 set up with pg_basebackup -R)
+    python benchmarks/benchmark.py --local --database-uri postgresql://localhost/ff_bench \
+        --replica-uri postgresql://localhost:5433/ff_bench
+
+    # An app that is already running (start it with SQL_INSTRUMENTATION=1
+    # to get query counts)
+    python benchmarks/benchmark.py --url http://localhost:5000
+
+Queries per request come from the Server-Timing header that
+SQL_INSTRUMENTATION adds; --local turns it on.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+import urllib.error
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+PASSWORD = 'benchmark-password'
+
+class Client:
+    """Minimal JSON/multipart HTTP client on urllib; records every call"""
+
+    def __init__(self, base_url, recorder, token=None):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.token = token
+
+    def request(self, scenario, method, path, json_body=None, body=None, content_type=None):
+        headers = {}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            content_type = 'application/json'
+        if content_type:
+            headers['Content-Type'] = content_type
+
+        req = urllib.request.Request(self.base_url + path, data=body, method=method, headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as response:
+                status = response.status
+                payload = response.read()
+                server_timing = response.headers.get('Server-Timing')
+        except urllib.error.HTTPError as e:
+            status = e.code
+            payload = e.read()
+            server_timing = e.headers.get('Server-Timing')
+        except (urllib.error.URLError, ConnectionError) as e:
+            status = 0
+            payload = str(e).encode()
+            server_timing = None
+        elapsed = time.perf_counter() - started
+
+        self.recorder.record(scenario, elapsed, status, len(payload) + len(body or b''), server_timing)
+        return status, payload
+
+    def json(self, scenario, method, path, json_body=None):
+        status, payload = self.request(scenario, method, path, json_body=json_body)
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+    def upload(self, scenario, name, content):
+        boundary = uuid.uuid4().hex
+        body = b''.join([
+            f'--{boundary}\r\n'.encode(),
+            f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'.encode(),
+            b'Content-Type: application/octet-stream\r\n\r\n',
+            content,
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ])
+        status, payload = self.request(scenario, 'POST', '/api/files', body=body,
+                                       content_type=f'multipart/form-data; boundary={boundary}')
+        try:
+            return status, json.loads(payload)
+        except ValueError:
+            return status, None
+
+def parse_queries(server_timing):
+    """Query count from a `db;dur=..;desc="N queries"` Server-Timing entry"""
+    if not server_timing or 'desc="' not in server_timing:
+        return None
+    try:
+        return int(server_timing.split('desc="', 1)[1].split(' ', 1)[0])
+    except ValueError:
+        return None
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, scenario, elapsed, status, size, server_timing):
+        with self._lock:
+            self.samples.setdefault(scenario, []).append((elapsed, status, size, parse_queries(server_timing)))
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(samples, wall_time):
+    latencies = sorted(sample[0] for sample in samples)
+    errors = sum(1 for sample in samples if not 200 <= sample[1] < 400)
+    queries = [sample[3] for sample in samples if sample[3] is not None]
+    transferred = sum(sample[2] for sample in samples)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'throughput_rps': round(len(samples) / wall_time, 1) if wall_time else None,
+        'mb_per_s': round(transferred / wall_time / (1024 * 1024), 2) if wall_time else None,
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+    }
+
+def parse_size(value):
+    units = {'k': 1024, 'm': 1024 * 1024, 'g': 1024 * 1024 * 1024}
+    value = value.strip().lower()
+    if value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def run_phase(name, workers, concurrency, wall_times):
+    """Run every callable of `workers` on a pool of `concurrency` threads"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(work) for work in workers]:
+            future.result()
+    wall_times[name] = time.perf_counter() - started
+
+def run_benchmark(base_url, concurrency, requests_per_scenario, sizes):
+    recorder = Recorder()
+    wall_times = {}
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"bench-{run_id}-{i}@inpt.ma" for i in range(concurrency)]
+
+    anonymous = Client(base_url, recorder)
+    run_phase('register', [
+        lambda email=email: anonymous.json('register', 'POST', '/api/auth/register', {
+            'email': email, 'password': PASSWORD, 'displayName': email.split('@')[0]
+        })
+        for email in emails
+    ], concurrency, wall_times)
+
+    clients = [None] * concurrency
+    def login(i):
+        status, data = anonymous.json('login', 'POST', '/api/auth/login', {'email': emails[i], 'password': PASSWORD})
+        if status != 200 or not data or 'token' not in data:
+            raise RuntimeError(f"Login failed for {emails[i]} ({status}): {data}")
+        clients[i] = (Client(base_url, recorder, data['token']), data['user']['id'])
+    run_phase('login', [lambda i=i: login(i) for i in range(concurrency)], concurrency, wall_times)
+
+    # Uploaded files are reused by the download and share scenarios
+    files = [[] for _ in range(concurrency)]
+    def upload(i, size):
+        client = clients[i][0]
+        for _ in range(max(1, requests_per_scenario // concurrency // len(sizes))):
+            status, data = client.upload(f'upload_{size}', f'bench-{size}.bin', os.urandom(size))
+            if status == 201 and data:
+                files[i].append(data['id'])
+    for size in sizes:
+        run_phase(f'upload_{size}', [lambda i=i, size=size: upload(i, size) for i in range(concurrency)],
+                  concurrency, wall_times)
+
+    per_worker = max(1, requests_per_scenario // concurrency)
+    def repeat(action, i):
+        for n in range(per_worker):
+            action(clients[i][0], n, i)
+
+    def download(client, n, i):
+        if files[i]:
+            client.request('download', 'GET', f"/api/files/{files[i][n % len(files[i])]}/download")
+
+    def share_revoke(client, n, i):
+        if not files[i]:
+            return
+        j = (i + 1 + n) % concurrency
+        if j == i:
+            return
+        file_id = files[i][n % len(files[i])]
+        client.json('share', 'POST', f"/api/files/{file_id}/share", {'email': emails[j], 'canView': True})
+        client.json('revoke', 'DELETE', f"/api/files/{file_id}/share/{clients[j][1]}")
+
+    scenarios = {
+        'list_files': lambda client, n, i: client.json('list_files', 'GET', '/api/files'),
+        'download': download,
+        'share_revoke': share_revoke,
+        'user_search': lambda client, n, i: client.json('user_search', 'GET', '/api/users/search?query=bench'),
+    }
+    for scenario, action in scenarios.items():
+        run_phase(scenario, [lambda i=i, action=action: repeat(action, i) for i in range(concurrency)],
+                  concurrency, wall_times)
+
+    results = {}
+    for scenario, samples in recorder.samples.items():
+        phase = scenario if scenario in wall_times else {'share': 'share_revoke', 'revoke': 'share_revoke'}[scenario]
+        results[scenario] = summarize(samples, wall_times[phase])
+    return results
+
+def start_local_app(database_uri, bcrypt_rounds, replica_uri=None):
+    """Serve a fresh app instance on a free port in a background thread"""
+    sys.path.insert(0, BACKEND_DIR)
+    from werkzeug.serving import make_server
+    from config import Config
+    from app import create_app
+    from models import db
+
+    workdir = tempfile.mkdtemp(prefix='ff-bench-')
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_uri or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        DATABASE_REPLICA_URI = replica_uri
+        UPLOAD_FOLDER = os.path.join(workdir, 'uploads')
+        SQL_INSTRUMENTATION = True
+        BCRYPT_LOG_ROUNDS = bcrypt_rounds
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(results, baseline=None):
+    columns = ('requests', 'errors', 'p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'mb_per_s', 'queries_per_request')
+    print(f"{'scenario':<16}" + ''.join(f"{column:>20}" for column in columns))
+    for scenario, summary in results.items():
+        cells = []
+        for column in columns:
+            value = summary.get(column)
+            cell = '-' if value is None else str(value)
+            previous = (baseline or {}).get(scenario, {}).get(column)
+            if column.endswith('_ms') and value is not None and previous:
+                cell += f" ({(value - previous) / previous * 100:+.0f}%)"
+            cells.append(f"{cell:>20}")
+        print(f"{scenario:<16}" + ''.join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--url', help="base URL of a running app")
+    target.add_argument('--local', action='store_true', help="start a throwaway app instance")
+    parser.add_argument('--database-uri', help="with --local: database to use instead of a temporary SQLite file")
+    parser.add_argument('--replica-uri', help="with --local: read replica of --database-uri for read-only endpoints")
+    parser.add_argument('--bcrypt-rounds', type=int, default=12, help="with --local: BCRYPT_LOG_ROUNDS (default 12)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help="requests per scenario")
+    parser.add_argument('--sizes', default='16k,1m,8m', help="upload sizes, comma separated")
+    parser.add_argument('--output', help="result file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="earlier result file to show latency changes against")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if args.local:
+        base_url, server = start_local_app(args.database_uri, args.bcrypt_rounds, args.replica_uri)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    try:
+        results = run_benchmark(base_url, args.concurrency, args.requests, sizes)
+    finally:
+        if server:
+            server.shutdown()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_report(results, baseline)
+
+    run = {
+        'timestamp': datetime.utcnow().isoformat(),
+        'revision': git_revision(),
+        'target': 'local' if args.local else args.url,
+        'database': (args.database_uri or 'sqlite') if args.local else None,
+        'replica': args.replica_uri if args.local else None,
+        'concurrency': args.concurrency,
+        'requests_per_scenario': args.requests,
+        'upload_sizes': sizes,
+        'results': results,
+    }
+    output = args.output or os.path.join(DEFAULT_RESULTS_DIR, f"{datetime.utcnow():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nSaved to {output}")
+
+if __name__ == '__main__':
+    main()
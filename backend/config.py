@@ -8,6 +8,73 @@ class Config:
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "your_default_jwt_secret")
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URI", "sqlite:///app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_ACCESS_TOKEN_EXPIRES = 60 * 60 * 24  # 1 day
+    # Short access tokens, renewed through /api/auth/refresh
+    JWT_ACCESS_TOKEN_EXPIRES = 15 * 60  # 15 minutes
+    JWT_REFRESH_TOKEN_EXPIRES = 60 * 60 * 24 * 30  # 30 days
     UPLOAD_FOLDER = os.path.abspath("backend/static/uploads")
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB max upload
+    # Resumable uploads: each chunk must fit in MAX_CONTENT_LENGTH
+    UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))  # 8 MB
+    MAX_UPLOAD_SIZE = int(os.environ.get("MAX_UPLOAD_SIZE", 10 * 1024 * 1024 * 1024))  # 10 GB
+    UPLOAD_SESSION_TTL = 60 * 60 * 24  # 1 day
+    UPLOAD_PIPELINE_STAGES = None  # stage classes run over every upload; None for upload_pipeline.DEFAULT_STAGES
+    # Download offload: "direct" streams from Flask, "x-accel" (nginx) and
+    # "x-sendfile" (Apache/lighttpd) let the front proxy send the bytes.
+    # For nginx, map the prefix to UPLOAD_FOLDER in an `internal` location.
+    DOWNLOAD_MODE = os.environ.get("DOWNLOAD_MODE", "direct")
+    X_ACCEL_REDIRECT_PREFIX = os.environ.get("X_ACCEL_REDIRECT_PREFIX", "/protected-uploads")
+    # Signed download URLs (defaults to SECRET_KEY when unset)
+    DOWNLOAD_URL_SECRET = os.environ.get("DOWNLOAD_URL_SECRET")
+    SIGNED_URL_TTL = 5 * 60  # 5 minutes
+    ARCHIVE_MAX_FILES = 1000
+    # Effective-permission cache of file_access_required, checked against files.acl_version
+    PERMISSION_CACHE_SIZE = 10000
+    PERMISSION_CACHE_TTL = 60  # seconds
+    # Authenticated-user snapshots of jwt_required_with_user
+    PRINCIPAL_CACHE_SIZE = 10000
+    PRINCIPAL_CACHE_TTL = 30  # seconds
+    # Seconds between keepalives on idle event streams; also how late they
+    # see changes committed by other worker processes
+    EVENT_STREAM_HEARTBEAT = 15
+    # Password hashing runs in its own process pool; 0 workers hashes inline
+    BCRYPT_LOG_ROUNDS = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))  # existing hashes are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_QUEUE_DEPTH = int(os.environ.get("PASSWORD_HASH_QUEUE_DEPTH", 32))  # waiting calls before 503
+    PASSWORD_HASH_TIMEOUT = 10  # seconds
+    PASSWORD_HASH_RETRY_AFTER = 2  # seconds, sent with 503 responses
+    # Failed-login throttle; counters are in memory unless LOGIN_THROTTLE_STORE
+    # names a factory for a shared ThrottleStore (see utils.login_throttle)
+    LOGIN_THROTTLE_STORE = None
+    LOGIN_THROTTLE_WINDOW = 5 * 60  # seconds
+    LOGIN_MAX_FAILURES_PER_EMAIL = 3
+    LOGIN_MAX_FAILURES_PER_CLIENT = 20  # per client address and email
+    LOGIN_MAX_FAILURES_PER_IP = 100  # per client address, any email; at most the memory store's max_hits
+    LOGIN_LOCKOUT_SECONDS = 30
+    # Revoked JWTs: in-memory Bloom filter backed by the revoked_tokens table
+    TOKEN_REVOCATION_CAPACITY = 100000
+    TOKEN_REVOCATION_ERROR_RATE = 0.01
+    TOKEN_REVOCATION_SYNC_INTERVAL = 5  # seconds before other processes' revocations apply
+    # Per-request SQL counts in a Server-Timing header and a JSON log line
+    SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "0") == "1"
+    SQL_N_PLUS_ONE_THRESHOLD = 5  # identical statements per request before warning
+    # Reverse proxies in front of the app that set X-Forwarded-For/-Proto/-Host;
+    # 0 uses the socket address (the headers would be client-forgeable)
+    TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", 0))
+    # Bearer token required by GET /metrics; unset leaves it open (keep it off the public proxy)
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    # SQLite profile, ignored on other databases (see utils.sqlite_profile)
+    SQLITE_SYNCHRONOUS = "NORMAL"  # safe with WAL: a crash can lose the last commits, not corrupt
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))  # ms to wait for the write lock
+    SQLITE_CACHE_SIZE = -64000  # negative: KiB, i.e. 64 MB of page cache per connection
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # 256 MB
+    SQLITE_SERIALIZE_WRITES = os.environ.get("SQLITE_SERIALIZE_WRITES", "1") == "1"
+    # Connection pool for server databases such as PostgreSQL (SQLite keeps SQLAlchemy's defaults)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))  # per process
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))  # extra connections under bursts
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))  # seconds, below server/proxy idle timeouts
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") == "1"
+    # Read-only endpoints use this replica when set (see utils.db_routing)
+    DATABASE_REPLICA_URI = os.environ.get("DATABASE_REPLICA_URI")
+    REPLICA_READ_YOUR_WRITES_WINDOW = int(os.environ.get("REPLICA_READ_YOUR_WRITES_WINDOW", 5))  # seconds on the primary after a write
+    REPLICA_RETRY_AFTER = int(os.environ.get("REPLICA_RETRY_AFTER", 30))  # seconds on the primary after a replica error
\ No newline at end of file
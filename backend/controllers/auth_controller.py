@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from services.auth_service import AuthService
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, decode_token
 from models import User, db
+from utils.principal_cache import get_principal_cache
+from utils.password_hasher import PasswordHasherBusy
+from utils.login_throttle import get_login_throttle
+from utils.token_revocation import revoke_token
+from utils.db_routing import read_replica
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import pyotp
 import base64
 
@@ -51,6 +56,8 @@ def register():
             "user": user.to_dict()
         }), 201
         
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         logger.exception("Unexpected error during registration")
         return jsonify({"message": f"Erreur inattendue: {str(e)}"}), 500
@@ -62,39 +69,80 @@ def login():
     email = data.get('email')
     password = data.get('password')
 
+    # The client address comes from X-Forwarded-For behind TRUSTED_PROXY_COUNT proxies
+    throttle = get_login_throttle()
+    seconds_left = throttle.blocked_for(email or '', request.remote_addr)
+    if seconds_left:
+        response = jsonify({'message': 'Too many attempts', 'seconds_left': seconds_left})
+        response.headers['Retry-After'] = str(seconds_left)
+        return response, 429
+
     user = User.query.filter_by(email=email).first()
     if not user:
+        throttle.record_failure(email or '', request.remote_addr)
         return jsonify({'message': 'Invalid credentials'}), 401
 
     # Check lockout
-    if hasattr(user, "lockout_until") and user.lockout_until and user.lockout_until > datetime.utcnow():
+    if user.lockout_until and user.lockout_until > datetime.utcnow():
         seconds_left = int((user.lockout_until - datetime.utcnow()).total_seconds())
         return jsonify({'message': 'locked', 'seconds_left': seconds_left}), 403
 
     if not user.check_password(password):
-        user.failed_login_attempts += 1
-        if user.failed_login_attempts >= 3:
-            user.lockout_until = datetime.utcnow() + timedelta(seconds=30)
-            user.failed_login_attempts = 0
-            db.session.commit()
-            return jsonify({'message': 'locked', 'seconds_left': 30}), 403
-        db.session.commit()
+        if throttle.record_failure(email, request.remote_addr):
+            lockout = current_app.config['LOGIN_LOCKOUT_SECONDS']
+            AuthService.start_lockout(user.id, lockout)
+            return jsonify({'message': 'locked', 'seconds_left': lockout}), 403
         return jsonify({'message': 'Invalid credentials'}), 401
 
-    # Success: reset attempts
-    user.failed_login_attempts = 0
-    user.lockout_until = None
-    db.session.commit()
+    throttle.record_success(email)
+    if db.session.is_modified(user):
+        # check_password upgraded the hash to the current cost
+        db.session.commit()
 
     # Check if 2FA is enabled
-    if user.is_2fa_enabled:
+    if user.two_factor_enabled:
         # If 2FA is enabled, return a status indicating 2FA is required
         # We won't issue the full token yet
         return jsonify({"message": "2FA required", "user_id": user.id}), 202 # Use 202 Accepted
 
     # If 2FA is NOT enabled, issue the full token
-    access_token = create_access_token(identity=user.id)
-    return jsonify({'token': access_token, 'user': user.to_dict()}), 200
+    access_token, refresh_token = AuthService.issue_tokens(user)
+    return jsonify({'token': access_token, 'refreshToken': refresh_token, 'user': user.to_dict()}), 200
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Trade a refresh token for a new pair; the old refresh token is revoked"""
+    user = User.query.get(int(get_jwt_identity()))
+    if not user or user.status != 'active':
+        return jsonify({"message": "User not found"}), 401
+
+    if not revoke_token(get_jwt()):
+        # Another request already traded this refresh token
+        db.session.rollback()
+        return jsonify({"message": "Token has been revoked"}), 401
+    db.session.commit()
+    access_token, refresh_token = AuthService.issue_tokens(user)
+    return jsonify({'token': access_token, 'refreshToken': refresh_token}), 200
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Revoke the access token and, if sent, its refresh token"""
+    payload = get_jwt()
+    revoke_token(payload)
+
+    data = request.get_json(silent=True) or {}
+    if data.get('refreshToken'):
+        try:
+            refresh_payload = decode_token(data['refreshToken'])
+        except Exception:
+            refresh_payload = None
+        if refresh_payload and refresh_payload.get('type') == 'refresh' and refresh_payload['sub'] == payload['sub']:
+            revoke_token(refresh_payload)
+
+    db.session.commit()
+    return jsonify({"message": "Déconnexion réussie"}), 200
 
 @auth_bp.route('/2fa/setup/init', methods=['POST'])
 @jwt_required()
@@ -160,8 +208,8 @@ def verify_2fa():
     totp = pyotp.TOTP(user.two_factor_secret)
     if totp.verify(code):
         # If 2FA code is valid, issue the full access token
-        access_token = create_access_token(identity=user.id)
-        return jsonify({'token': access_token, 'user': user.to_dict()}), 200
+        access_token, refresh_token = AuthService.issue_tokens(user)
+        return jsonify({'token': access_token, 'refreshToken': refresh_token, 'user': user.to_dict()}), 200
     else:
         return jsonify({"message": "Invalid 2FA code"}), 400
 
@@ -190,6 +238,7 @@ def disable_2fa():
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
+@read_replica
 def get_current_user():
     user_id = get_jwt_identity()
     from models import User
@@ -228,6 +277,9 @@ def delete_users():
             User.query.filter(User.role != 'admin').delete()
             
         db.session.commit()
+        if not email_to_delete:
+            # Bulk deletes skip ORM events: drop every cached principal
+            get_principal_cache().clear()
         return jsonify({"message": "Utilisateurs supprimés avec succès"}), 200
         
     except Exception as e:
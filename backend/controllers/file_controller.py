@@ -1,8 +1,15 @@
 import os
-from flask import Blueprint, request, jsonify, send_file, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import time
+from flask import Blueprint, request, jsonify, current_app, url_for, Response
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
 from services.file_service import FileService
 from utils.decorators import jwt_required_with_user, file_access_required
+from utils.file_response import send_stored_file, send_zip_archive
+from utils.signed_urls import sign_download, verify_download
+from utils.event_hub import event_hub, format_sse
+from utils.pagination import parse_datetime_arg
+from utils.db_routing import read_replica
+from utils.token_revocation import get_revocation_list
 import logging
 
 logger = logging.getLogger(__name__)
@@ -45,22 +52,172 @@ def handle_files():
 
 @file_bp.route('', methods=['GET'])
 @jwt_required_with_user
+@read_replica
 def get_files(user):
+    # Paginated listing of one scope ("owned" or "shared")
+    if request.args.get('scope'):
+        return list_files_page(user)
+    
     # Get files owned by the user
     own_files = FileService.get_user_files(user.id)
     
     # Get files shared with the user
     shared_files = FileService.get_shared_files(user.id)
     
+    # Owners and shares of both lists are loaded in one batch
+    serialized = FileService.serialize_files(own_files + shared_files)
+    
     return jsonify({
-        "files": [file.to_dict() for file in own_files],
-        "sharedFiles": [file.to_dict() for file in shared_files]
+        "files": serialized[:len(own_files)],
+        "sharedFiles": serialized[len(own_files):]
     }), 200
 
+@file_bp.route('/changes', methods=['GET'])
+@jwt_required_with_user
+def get_changes(user):
+    cursor = request.args.get('cursor')
+    if cursor is not None:
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            return jsonify({"message": "Invalid cursor"}), 400
+    
+    from services.change_log_service import ChangeLogService
+    return jsonify(ChangeLogService.get_changes(user.id, cursor, request.args.get('limit'))), 200
+
+@file_bp.route('/events', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events feed of the user's changes, read from the change log.
+    Commits in this process wake the stream at once; those of other worker
+    processes are picked up at the next heartbeat. The stream ends with an
+    'expired' event when its token expires or is revoked: reconnect with a
+    fresh one and Last-Event-ID.
+    Each open stream holds a server thread for its whole life, so size the
+    WSGI server for the expected streams on top of regular requests (e.g.
+    gunicorn's gthread worker with --threads), or use an async worker.
+    """
+    # EventSource cannot send headers, so the token may come in ?jwt=
+    try:
+        verify_jwt_in_request(locations=['headers', 'query_string'])
+        user_id = int(get_jwt_identity())
+        token = get_jwt()
+    except Exception as e:
+        logger.warning(f"Event stream auth error: {str(e)}")
+        return jsonify({"message": "Authentication required"}), 401
+    
+    from services.change_log_service import ChangeLogService
+    app = current_app._get_current_object()
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    heartbeat = app.config['EVENT_STREAM_HEARTBEAT']
+    subscription = event_hub.subscribe(user_id)
+    
+    # Missed changes are read before streaming; the request context is gone afterwards
+    missed = ChangeLogService.get_changes(user_id, last_event_id)
+    
+    def token_revoked():
+        with app.app_context():
+            return get_revocation_list().is_revoked(token['jti'])
+    
+    def changes_after(cursor):
+        with app.app_context():
+            while True:
+                page = ChangeLogService.get_changes(user_id, cursor)
+                for change in page['changes']:
+                    change.pop('file', None)
+                    cursor = change['cursor']
+                    yield change
+                if not page['hasMore']:
+                    return
+    
+    def generate():
+        last_sent = missed['cursor']
+        try:
+            yield "retry: 5000\n\n"
+            if missed['hasMore']:
+                # Too far behind to replay: the client must refetch
+                yield format_sse({}, event='reset')
+                return
+            for change in missed['changes']:
+                change.pop('file', None)
+                yield format_sse(change, event='change', event_id=change['cursor'])
+            while True:
+                expires_in = token['exp'] - time.time()
+                if expires_in <= 0:
+                    break
+                woken = subscription.wait(min(heartbeat, expires_in))
+                if token_revoked():
+                    break
+                sent = False
+                for change in changes_after(last_sent):
+                    last_sent = change['cursor']
+                    sent = True
+                    yield format_sse(change, event='change', event_id=last_sent)
+                if not sent and not woken:
+                    yield ": keepalive\n\n"
+            yield format_sse({}, event='expired')
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@file_bp.route('/shared-users', methods=['GET'])
+@jwt_required_with_user
+@read_replica
+def get_shared_users_batch(user):
+    # ?ids=1,2,3 for specific files, nothing for all of the caller's shared files
+    ids = request.args.get('ids')
+    file_ids = None
+    if ids:
+        try:
+            file_ids = list(dict.fromkeys(int(file_id) for file_id in ids.split(',') if file_id))
+        except ValueError:
+            return jsonify({"message": "Invalid file id"}), 400
+    
+    from services.acl_service import ACLService
+    success, result = ACLService.get_shared_users_batch(user.id, file_ids)
+    
+    if not success:
+        return jsonify({"message": result}), 400
+    
+    return jsonify({"sharedUsers": {str(file_id): users for file_id, users in result.items()}}), 200
+
+def list_files_page(user):
+    args = request.args
+    try:
+        min_size = int(args['minSize']) if args.get('minSize') else None
+        max_size = int(args['maxSize']) if args.get('maxSize') else None
+        created_after = parse_datetime_arg(args.get('createdAfter'))
+        created_before = parse_datetime_arg(args.get('createdBefore'))
+    except ValueError:
+        return jsonify({"message": "Invalid filter value"}), 400
+    
+    success, result = FileService.list_files(
+        user.id,
+        scope=args.get('scope'),
+        sort=args.get('sort', 'created_at'),
+        order=args.get('order', 'desc'),
+        limit=args.get('limit'),
+        cursor=args.get('cursor'),
+        file_type=args.get('type'),
+        min_size=min_size,
+        max_size=max_size,
+        created_after=created_after,
+        created_before=created_before
+    )
+    
+    if not success:
+        return jsonify({"message": result}), 400
+        
+    return jsonify(result), 200
+
 @file_bp.route('', methods=['POST'])
 @jwt_required()
 def upload_file():
-    user_id = get_jwt_identity()
+    user_id = int(get_jwt_identity())
     print("UPLOAD: user_id", user_id)
     if 'file' not in request.files:
         print("NO FILE PART")
@@ -96,15 +253,73 @@ def get_file(user, file):
 @jwt_required_with_user
 @file_access_required('view')
 def download_file(user, file):
+    response = send_stored_file(file)
+    
     # Ensure file exists on disk
-    if not os.path.exists(file.path):
+    if response is None:
         return jsonify({"message": "File not found on server"}), 404
         
-    return send_file(
-        file.path,
-        as_attachment=True,
-        download_name=file.name
-    )
+    return response
+
+@file_bp.route('/<int:file_id>/download-url', methods=['POST'])
+@jwt_required_with_user
+@file_access_required('view')
+def create_download_url(user, file):
+    if not file.blob_hash:
+        return jsonify({"message": "Signed URLs are not available for this file"}), 400
+        
+    params = sign_download(file)
+    return jsonify({
+        "url": url_for('files.download_signed', file_id=file.id, **params),
+        "expiresAt": params['e']
+    }), 200
+
+@file_bp.route('/<int:file_id>/content', methods=['GET'])
+def download_signed(file_id):
+    # Everything needed is carried by the signed URL: no database access
+    file = verify_download(file_id, request.args)
+    if file is None:
+        return jsonify({"message": "Invalid or expired download link"}), 403
+        
+    # The content behind a blob hash never changes, so shared caches may keep it
+    response = send_stored_file(file, cache_control=f"public, max-age={current_app.config['SIGNED_URL_TTL']}, immutable")
+    if response is None:
+        return jsonify({"message": "File not found on server"}), 404
+        
+    return response
+
+@file_bp.route('/archive', methods=['POST'])
+@jwt_required_with_user
+def download_archive(user):
+    data = request.json
+    file_ids = data.get('fileIds') if data else None
+    
+    if not file_ids or not isinstance(file_ids, list):
+        return jsonify({"message": "fileIds is required"}), 400
+    if len(file_ids) > current_app.config['ARCHIVE_MAX_FILES']:
+        return jsonify({"message": "Too many files requested"}), 400
+    try:
+        file_ids = list(dict.fromkeys(int(file_id) for file_id in file_ids))
+    except (TypeError, ValueError):
+        return jsonify({"message": "Invalid file id"}), 400
+    
+    files = FileService.get_viewable_files(user.id, file_ids)
+    if len(files) != len(file_ids):
+        found = {file.id for file in files}
+        return jsonify({
+            "message": "Access denied",
+            "fileIds": [file_id for file_id in file_ids if file_id not in found]
+        }), 403
+    
+    # Keep the order the client asked for
+    position = {file_id: index for index, file_id in enumerate(file_ids)}
+    files.sort(key=lambda file: position[file.id])
+    
+    response = send_zip_archive(files)
+    if response is None:
+        return jsonify({"message": "File not found on server"}), 404
+        
+    return response
 
 @file_bp.route('/<int:file_id>', methods=['DELETE'])
 @jwt_required_with_user
@@ -164,6 +379,7 @@ def revoke_share(user, file_id, user_id):
 
 @file_bp.route('/<int:file_id>/shared-users', methods=['GET'])
 @jwt_required_with_user
+@read_replica
 def get_shared_users(user, file_id):
     from services.acl_service import ACLService
     success, shared_users_or_message = ACLService.get_shared_users(file_id, user.id)
@@ -173,3 +389,81 @@ def get_shared_users(user, file_id):
         return jsonify({"message": shared_users_or_message}), 400
 
     return jsonify({"sharedUsers": shared_users_or_message}), 200
+
+@file_bp.route('/uploads', methods=['POST'])
+@jwt_required_with_user
+def create_upload_session(user):
+    data = request.json
+
+    if not data:
+        return jsonify({"message": "No input data provided"}), 400
+
+    from services.upload_service import UploadService
+    success, result = UploadService.create_session(
+        user.id,
+        data.get('filename'),
+        data.get('size'),
+        content_type=data.get('contentType'),
+        chunk_size=data.get('chunkSize')
+    )
+
+    if not success:
+        return jsonify({"message": result}), 400
+
+    return jsonify(UploadService.get_status(result)), 201
+
+@file_bp.route('/uploads/<session_id>', methods=['GET'])
+@jwt_required_with_user
+def get_upload_session(user, session_id):
+    from services.upload_service import UploadService
+    session = UploadService.get_session(session_id, user.id)
+    if not session:
+        return jsonify({"message": "Upload session not found"}), 404
+
+    return jsonify(UploadService.get_status(session)), 200
+
+@file_bp.route('/uploads/<session_id>/chunks/<int:index>', methods=['PUT'])
+@jwt_required_with_user
+def upload_chunk(user, session_id, index):
+    from services.upload_service import UploadService
+    session = UploadService.get_session(session_id, user.id)
+    if not session:
+        return jsonify({"message": "Upload session not found"}), 404
+
+    # Read the raw body as a stream so the chunk is never held in memory
+    success, result = UploadService.write_chunk(session, index, request.stream, request.content_length)
+
+    if not success:
+        return jsonify({"message": result}), 400
+
+    return jsonify(result), 200
+
+@file_bp.route('/uploads/<session_id>/complete', methods=['POST'])
+@jwt_required_with_user
+def complete_upload(user, session_id):
+    from services.upload_service import UploadService
+    session = UploadService.get_session(session_id, user.id)
+    if not session:
+        return jsonify({"message": "Upload session not found"}), 404
+
+    try:
+        success, result = UploadService.finalize(session)
+    except Exception as e:
+        logger.error(f"Error finalizing upload {session_id}: {str(e)}")
+        return jsonify({"message": f"Upload failed: {str(e)}"}), 500
+
+    if not success:
+        return jsonify({"message": result}), 409
+
+    return jsonify(result.to_dict()), 201
+
+@file_bp.route('/uploads/<session_id>', methods=['DELETE'])
+@jwt_required_with_user
+def abort_upload(user, session_id):
+    from services.upload_service import UploadService
+    session = UploadService.get_session(session_id, user.id)
+    if not session:
+        return jsonify({"message": "Upload session not found"}), 404
+
+    UploadService.abort(session)
+    return jsonify({"message": "Upload session aborted"}), 200
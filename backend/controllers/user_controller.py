@@ -1,6 +1,10 @@
 from flask import Blueprint, request, jsonify
 from utils.decorators import jwt_required_with_user
-from models import User, db
+from utils.db_routing import read_replica
+from sqlalchemy import text
+from models import db
+from utils.pagination import parse_datetime_arg
+from services.user_service import UserService
 
 user_bp = Blueprint('users', __name__, url_prefix='/api/users')
 
@@ -8,19 +12,15 @@ user_bp = Blueprint('users', __name__, url_prefix='/api/users')
 def debug():
     try:
         # Check database connection
-        db.session.execute('SELECT 1')
+        db.session.execute(text('SELECT 1'))
         
-        # Get user count
-        user_count = User.query.count()
-        
-        # Get all users
-        users = User.query.all()
+        # Aggregate counts only: the cost doesn't grow with the user list
+        stats = UserService.get_stats()
         
         return jsonify({
             "status": "ok",
-            "user_count": user_count,
-            "users": [user.to_dict() for user in users],
-            "database_url": str(db.engine.url)
+            **stats,
+            "database_url": db.engine.url.render_as_string(hide_password=True)
         }), 200
     except Exception as e:
         return jsonify({
@@ -31,36 +31,45 @@ def debug():
 @user_bp.route('', methods=['GET'])
 @jwt_required_with_user
 def get_users(user):
+    args = request.args
     try:
-        users = User.query.all()
-        return jsonify({
-            "users": [user.to_dict() for user in users]
-        }), 200
+        created_after = parse_datetime_arg(args.get('createdAfter'))
+        created_before = parse_datetime_arg(args.get('createdBefore'))
+    except ValueError:
+        return jsonify({"message": "Invalid filter value"}), 400
+    
+    try:
+        success, result = UserService.list_users(
+            role=args.get('role'),
+            status=args.get('status'),
+            created_after=created_after,
+            created_before=created_before,
+            sort=args.get('sort', 'created_at'),
+            order=args.get('order', 'desc'),
+            limit=args.get('limit'),
+            cursor=args.get('cursor')
+        )
     except Exception as e:
         return jsonify({"message": str(e)}), 500
+    
+    if not success:
+        return jsonify({"message": result}), 400
+    
+    return jsonify(result), 200
 
 @user_bp.route('/search', methods=['GET'])
 @jwt_required_with_user
+@read_replica
 def search_users(user):
     try:
         query = request.args.get('query', '')
+        limit = UserService.parse_search_limit(request.args.get('limit'))
         
-        # If query is empty, return all users
-        if not query:
-            users = User.query.all()
-        else:
-            # Search with the query
-            users = User.query.filter(
-                (User.email.ilike(f'%{query}%')) | 
-                (User.display_name.ilike(f'%{query}%'))
-            ).all()
-        
-        # Don't include the current user
-        users = [u for u in users if u.id != user.id]
+        # Indexed, ranked and limited; the current user is excluded in SQL
+        users = UserService.search_users(query, exclude_user_id=user.id, limit=limit)
         
         return jsonify({
             "users": [user.to_dict() for user in users]
         }), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
-
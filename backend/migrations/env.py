@@ -45,6 +45,21 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Created with raw SQL by 0b8d3e5f7a21 (user search index) and absent from
+# the models: the FTS5 table with its shadow tables, and the trigram indexes
+UNMANAGED_TABLE_PREFIX = 'users_fts'
+UNMANAGED_INDEXES = {'ix_users_email_trgm', 'ix_users_display_name_trgm'}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep autogenerate from dropping the objects it doesn't model"""
+    if type_ == 'table' and name.startswith(UNMANAGED_TABLE_PREFIX):
+        return False
+    if type_ == 'index' and name in UNMANAGED_INDEXES:
+        return False
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +80,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -97,6 +113,7 @@ def run_migrations_online():
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
@@ -0,0 +1,70 @@
+"""user search index
+
+Revision ID: 0b8d3e5f7a21
+Revises: 6c1e4f8a2b97
+Create Date: 2026-10-18 18:05:37.480126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b8d3e5f7a21'
+down_revision = '6c1e4f8a2b97'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        email_local, display_name, content='', prefix='1 2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, email_local, display_name)
+        VALUES (new.id, CASE WHEN instr(new.email, '@') > 0 THEN substr(new.email, 1, instr(new.email, '@') - 1) ELSE new.email END, new.display_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, email_local, display_name)
+        VALUES ('delete', old.id, CASE WHEN instr(old.email, '@') > 0 THEN substr(old.email, 1, instr(old.email, '@') - 1) ELSE old.email END, old.display_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF email, display_name ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, email_local, display_name)
+        VALUES ('delete', old.id, CASE WHEN instr(old.email, '@') > 0 THEN substr(old.email, 1, instr(old.email, '@') - 1) ELSE old.email END, old.display_name);
+        INSERT INTO users_fts(rowid, email_local, display_name)
+        VALUES (new.id, CASE WHEN instr(new.email, '@') > 0 THEN substr(new.email, 1, instr(new.email, '@') - 1) ELSE new.email END, new.display_name);
+    END""",
+    # Index the users that already exist
+    """INSERT INTO users_fts(rowid, email_local, display_name)
+    SELECT id, CASE WHEN instr(email, '@') > 0 THEN substr(email, 1, instr(email, '@') - 1) ELSE email END, display_name
+    FROM users""",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS users_fts_au",
+    "DROP TRIGGER IF EXISTS users_fts_ad",
+    "DROP TRIGGER IF EXISTS users_fts_ai",
+    "DROP TABLE IF EXISTS users_fts",
+]
+
+POSTGRESQL_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_display_name_trgm ON users USING gin (display_name gin_trgm_ops)",
+]
+
+POSTGRESQL_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_users_display_name_trgm",
+    "DROP INDEX IF EXISTS ix_users_email_trgm",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRESQL_UPGRADE}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRESQL_DOWNGRADE}.get(dialect, []):
+        op.execute(statement)
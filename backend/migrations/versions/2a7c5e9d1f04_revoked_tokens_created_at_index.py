@@ -0,0 +1,26 @@
+"""revoked tokens created_at index
+
+Revision ID: 2a7c5e9d1f04
+Revises: 9d4b7e2a1c58
+Create Date: 2026-10-18 21:12:37.504128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a7c5e9d1f04'
+down_revision = '9d4b7e2a1c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_revoked_tokens_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_revoked_tokens_created_at'))
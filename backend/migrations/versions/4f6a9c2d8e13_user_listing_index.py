@@ -0,0 +1,26 @@
+"""user listing index
+
+Revision ID: 4f6a9c2d8e13
+Revises: 0b8d3e5f7a21
+Create Date: 2026-10-18 19:22:14.633905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f6a9c2d8e13'
+down_revision = '0b8d3e5f7a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_created_at_id')
@@ -0,0 +1,36 @@
+"""file changes log
+
+Revision ID: 5e0a8b3d9c62
+Revises: c41d7e9a2f35
+Create Date: 2026-10-18 12:40:05.271839
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0a8b3d9c62'
+down_revision = 'c41d7e9a2f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('file_changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('file_changes', schema=None) as batch_op:
+        batch_op.create_index('ix_file_changes_user_id_id', ['user_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('file_changes', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_changes_user_id_id')
+
+    op.drop_table('file_changes')
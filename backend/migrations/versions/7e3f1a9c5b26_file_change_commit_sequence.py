@@ -0,0 +1,43 @@
+"""file change commit sequence
+
+Revision ID: 7e3f1a9c5b26
+Revises: 2a7c5e9d1f04
+Create Date: 2026-10-18 21:48:09.317652
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e3f1a9c5b26'
+down_revision = '2a7c5e9d1f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('file_change_sequence',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('file_changes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('seq', sa.BigInteger(), nullable=True))
+
+    # Existing cursors are ids: keep them valid by numbering old rows the same
+    op.execute("UPDATE file_changes SET seq = id")
+    op.execute("INSERT INTO file_change_sequence (id, value) SELECT 1, COALESCE(MAX(id), 0) FROM file_changes")
+
+    with op.batch_alter_table('file_changes', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_changes_user_id_id')
+        batch_op.create_index('ix_file_changes_user_id_seq', ['user_id', 'seq'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('file_changes', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_changes_user_id_seq')
+        batch_op.create_index('ix_file_changes_user_id_id', ['user_id', 'id'], unique=False)
+        batch_op.drop_column('seq')
+
+    op.drop_table('file_change_sequence')
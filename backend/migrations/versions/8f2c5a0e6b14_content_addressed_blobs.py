@@ -0,0 +1,40 @@
+"""content addressed blobs
+
+Revision ID: 8f2c5a0e6b14
+Revises: 3b9e1d7c4a21
+Create Date: 2026-10-18 10:03:12.540871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2c5a0e6b14'
+down_revision = '3b9e1d7c4a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('blobs',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('path', sa.String(length=512), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_files_blob_hash'), ['blob_hash'], unique=False)
+        batch_op.create_foreign_key('fk_files_blob_hash_blobs', 'blobs', ['blob_hash'], ['hash'])
+
+
+def downgrade():
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_files_blob_hash_blobs', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_files_blob_hash'))
+        batch_op.drop_column('blob_hash')
+
+    op.drop_table('blobs')
@@ -0,0 +1,33 @@
+"""file share indexes
+
+Revision ID: 9d4b7e2a1c58
+Revises: 4f6a9c2d8e13
+Create Date: 2026-10-18 20:05:41.218374
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4b7e2a1c58'
+down_revision = '4f6a9c2d8e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the first share of any duplicated (file, recipient) pair
+    op.execute(
+        "DELETE FROM file_shares WHERE id NOT IN "
+        "(SELECT MIN(id) FROM file_shares GROUP BY file_id, user_id)"
+    )
+    with op.batch_alter_table('file_shares', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_file_shares_file_user', ['file_id', 'user_id'])
+        batch_op.create_index('ix_file_shares_user_id', ['user_id', 'can_view', 'file_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('file_shares', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_shares_user_id')
+        batch_op.drop_constraint('uq_file_shares_file_user', type_='unique')
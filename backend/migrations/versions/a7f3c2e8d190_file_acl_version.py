@@ -0,0 +1,26 @@
+"""file acl version
+
+Revision ID: a7f3c2e8d190
+Revises: 5e0a8b3d9c62
+Create Date: 2026-10-18 13:55:31.604729
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7f3c2e8d190'
+down_revision = '5e0a8b3d9c62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('acl_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.drop_column('acl_version')
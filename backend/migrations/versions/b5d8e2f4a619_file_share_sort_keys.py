@@ -0,0 +1,52 @@
+"""file share sort keys
+
+Revision ID: b5d8e2f4a619
+Revises: 7e3f1a9c5b26
+Create Date: 2026-10-18 23:12:07.504912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d8e2f4a619'
+down_revision = '7e3f1a9c5b26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('file_shares', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('file_name', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('file_size', sa.BigInteger(), nullable=True))
+        batch_op.add_column(sa.Column('file_type', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('file_created_at', sa.DateTime(), nullable=True))
+
+    # Copy the sort keys of the existing shares from their files
+    op.execute(
+        "UPDATE file_shares SET "
+        "file_name = (SELECT name FROM files WHERE files.id = file_shares.file_id), "
+        "file_size = (SELECT size FROM files WHERE files.id = file_shares.file_id), "
+        "file_type = (SELECT type FROM files WHERE files.id = file_shares.file_id), "
+        "file_created_at = (SELECT created_at FROM files WHERE files.id = file_shares.file_id)"
+    )
+
+    with op.batch_alter_table('file_shares', schema=None) as batch_op:
+        batch_op.alter_column('file_name', existing_type=sa.String(length=255), nullable=False)
+        batch_op.create_index('ix_file_shares_user_name', ['user_id', 'can_view', 'file_name', 'file_id'], unique=False)
+        batch_op.create_index('ix_file_shares_user_size', ['user_id', 'can_view', 'file_size', 'file_id'], unique=False)
+        batch_op.create_index('ix_file_shares_user_created', ['user_id', 'can_view', 'file_created_at', 'file_id'], unique=False)
+        batch_op.create_index('ix_file_shares_user_type', ['user_id', 'can_view', 'file_type', 'file_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('file_shares', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_shares_user_type')
+        batch_op.drop_index('ix_file_shares_user_created')
+        batch_op.drop_index('ix_file_shares_user_size')
+        batch_op.drop_index('ix_file_shares_user_name')
+        batch_op.drop_column('file_created_at')
+        batch_op.drop_column('file_type')
+        batch_op.drop_column('file_size')
+        batch_op.drop_column('file_name')
@@ -0,0 +1,36 @@
+"""file listing indexes
+
+Revision ID: c41d7e9a2f35
+Revises: 8f2c5a0e6b14
+Create Date: 2026-10-18 11:26:47.903115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e9a2f35'
+down_revision = '8f2c5a0e6b14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination compares raw column values: NULLs would never match
+    op.execute("UPDATE files SET type = 'application/octet-stream' WHERE type IS NULL")
+    op.execute("UPDATE files SET size = 0 WHERE size IS NULL")
+
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.create_index('ix_files_owner_created', ['owner_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_files_owner_name', ['owner_id', 'name', 'id'], unique=False)
+        batch_op.create_index('ix_files_owner_size', ['owner_id', 'size', 'id'], unique=False)
+        batch_op.create_index('ix_files_owner_type', ['owner_id', 'type', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('files', schema=None) as batch_op:
+        batch_op.drop_index('ix_files_owner_type')
+        batch_op.drop_index('ix_files_owner_size')
+        batch_op.drop_index('ix_files_owner_name')
+        batch_op.drop_index('ix_files_owner_created')
@@ -0,0 +1,26 @@
+"""user lockout until
+
+Revision ID: d92b6f1e3a47
+Revises: a7f3c2e8d190
+Create Date: 2026-10-18 15:12:08.274310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd92b6f1e3a47'
+down_revision = 'a7f3c2e8d190'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('lockout_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('lockout_until')
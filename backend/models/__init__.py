@@ -1,9 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
+from .routing_session import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 
 from .user import User
 from .file import File
 from .file_share import FileShare
+from .upload_session import UploadSession
+from .blob import Blob
+from .file_change import FileChange, FileChangeSequence
+from .revoked_token import RevokedToken
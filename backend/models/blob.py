@@ -0,0 +1,15 @@
+from datetime import datetime
+from . import db
+
+class Blob(db.Model):
+    __tablename__ = 'blobs'
+
+    # SHA-256 of the content, hex encoded
+    hash = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(512), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    files = db.relationship('File', backref='blob', lazy=True)
@@ -3,23 +3,40 @@ from . import db
 
 class File(db.Model):
     __tablename__ = 'files'
+    __table_args__ = (
+        # Keyset pagination: one index per sort column, scoped to the owner
+        db.Index('ix_files_owner_created', 'owner_id', 'created_at', 'id'),
+        db.Index('ix_files_owner_name', 'owner_id', 'name', 'id'),
+        db.Index('ix_files_owner_size', 'owner_id', 'size', 'id'),
+        db.Index('ix_files_owner_type', 'owner_id', 'type', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     path = db.Column(db.String(512), nullable=False)
-    type = db.Column(db.String(100))
-    size = db.Column(db.Integer)
+    type = db.Column(db.String(100), default='application/octet-stream')
+    size = db.Column(db.BigInteger, default=0)
     is_shared = db.Column(db.Boolean, default=False)
+    # Bumped on every share change; invalidates cached permissions
+    acl_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign Keys
     owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Content-addressed storage; NULL for files uploaded before deduplication
+    blob_hash = db.Column(db.String(64), db.ForeignKey('blobs.hash'), nullable=True, index=True)
     
     # Relationships
-    shares = db.relationship('FileShare', backref='shared_file', lazy='joined', cascade='all, delete-orphan')
+    shares = db.relationship('FileShare', backref='shared_file', lazy='select', cascade='all, delete-orphan')
     
-    def to_dict(self):
+    def to_dict(self, owner=None, shared_users=None):
+        """Serialize the file; list endpoints pass preloaded owner and
+        shared_users (see FileService.serialize_files) to skip lazy loads"""
+        if owner is None:
+            owner = self.owner
+        if shared_users is None:
+            shared_users = [shared_user_dict(share, share.user) for share in self.shares] if self.is_shared else []
         return {
             'id': self.id,
             'name': self.name,
@@ -27,12 +44,15 @@ class File(db.Model):
             'size': self.size,
             'isShared': self.is_shared,
             'createdAt': self.created_at.isoformat(),
-            'owner': self.owner.to_dict() if self.owner else None,
-            'sharedUsers': [{
-                'id': share.user.id,
-                'email': share.user.email,
-                'canView': share.can_view,
-                'canEdit': share.can_edit,
-                'canDelete': share.can_delete
-            } for share in self.shares] if self.is_shared else []
+            'owner': owner.to_dict() if owner else None,
+            'sharedUsers': shared_users
         }
+
+def shared_user_dict(share, user):
+    return {
+        'id': user.id,
+        'email': user.email,
+        'canView': share.can_view,
+        'canEdit': share.can_edit,
+        'canDelete': share.can_delete
+    }
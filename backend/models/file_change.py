@@ -0,0 +1,44 @@
+from datetime import datetime
+from . import db
+
+class FileChange(db.Model):
+    """Append-only log of file events, one row per user who should see it.
+    `seq` is the cursor of the changes feed. Unlike the autoincrement id,
+    which is handed out at insert, it is taken from FileChangeSequence just
+    before commit, so it grows in commit order: a reader that has seen seq N
+    can never later find a committed change below N."""
+    __tablename__ = 'file_changes'
+    __table_args__ = (
+        db.Index('ix_file_changes_user_id_seq', 'user_id', 'seq'),
+    )
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    SHARED = 'shared'
+    REVOKED = 'revoked'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    # No foreign key: entries outlive the file they describe
+    file_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(20), nullable=False)
+    # Set by ChangeLogService when the transaction commits
+    seq = db.Column(db.BigInteger)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'cursor': self.seq,
+            'fileId': self.file_id,
+            'action': self.action,
+            'createdAt': self.created_at.isoformat()
+        }
+
+class FileChangeSequence(db.Model):
+    """Single-row counter behind FileChange.seq. Incrementing it locks the row
+    until commit, so concurrent writers draw their values in commit order."""
+    __tablename__ = 'file_change_sequence'
+
+    id = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
@@ -1,8 +1,21 @@
 from . import db
+from .file import File
 from datetime import datetime
+from sqlalchemy import event, inspect
 
 class FileShare(db.Model):
     __tablename__ = 'file_shares'
+    __table_args__ = (
+        # One share per (file, recipient): concurrent shares can't duplicate rows
+        db.UniqueConstraint('file_id', 'user_id', name='uq_file_shares_file_user'),
+        # "Shared with me" listings and the per-recipient ACL checks
+        db.Index('ix_file_shares_user_id', 'user_id', 'can_view', 'file_id'),
+        # Keyset pagination of "shared with me": one index per sort column
+        db.Index('ix_file_shares_user_name', 'user_id', 'can_view', 'file_name', 'file_id'),
+        db.Index('ix_file_shares_user_size', 'user_id', 'can_view', 'file_size', 'file_id'),
+        db.Index('ix_file_shares_user_created', 'user_id', 'can_view', 'file_created_at', 'file_id'),
+        db.Index('ix_file_shares_user_type', 'user_id', 'can_view', 'file_type', 'file_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     file_id = db.Column(db.Integer, db.ForeignKey('files.id'), nullable=False)
@@ -11,5 +24,40 @@ class FileShare(db.Model):
     can_edit = db.Column(db.Boolean, default=False)
     can_delete = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Copies of the file's sort keys, so shared listings are read in index order
+    file_name = db.Column(db.String(255), nullable=False)
+    file_size = db.Column(db.BigInteger)
+    file_type = db.Column(db.String(100))
+    file_created_at = db.Column(db.DateTime)
+    
+    def copy_sort_keys(self, file):
+        self.file_name = file.name
+        self.file_size = file.size
+        self.file_type = file.type
+        self.file_created_at = file.created_at
     
     # Relationships are defined in File and User models
+
+_SORT_KEYS = {'name': 'file_name', 'size': 'file_size', 'type': 'file_type', 'created_at': 'file_created_at'}
+
+@event.listens_for(FileShare, 'before_insert')
+def _copy_share_sort_keys(mapper, connection, target):
+    # Shares added without copy_sort_keys read them from their file
+    if target.file_name is None:
+        file = connection.execute(
+            db.select(File.name, File.size, File.type, File.created_at).where(File.id == target.file_id)
+        ).one()
+        target.copy_sort_keys(file)
+
+@event.listens_for(File, 'after_update')
+def _update_share_sort_keys(mapper, connection, target):
+    state = inspect(target)
+    changed = {
+        share_column: getattr(target, file_column)
+        for file_column, share_column in _SORT_KEYS.items()
+        if state.attrs[file_column].history.has_changes()
+    }
+    if changed:
+        connection.execute(
+            FileShare.__table__.update().where(FileShare.file_id == target.id).values(**changed)
+        )
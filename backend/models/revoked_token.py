@@ -0,0 +1,14 @@
+from datetime import datetime
+from . import db
+
+class RevokedToken(db.Model):
+    """JWTs revoked before they expire. created_at lets each process load
+    only the rows added since its last sync."""
+    __tablename__ = 'revoked_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    # Rows are purged once the token would have expired anyway
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -0,0 +1,21 @@
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = 'replica'
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the 'replica' bind once read_replica is set
+    in its info (see utils.db_routing). Flushes, DML statements and every
+    read after the session's first write stay on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if isinstance(clause, UpdateBase):
+            self.info['wrote'] = True
+        elif (bind is None and self.info.get('read_replica')
+                and not self.info.get('wrote') and not self._flushing):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
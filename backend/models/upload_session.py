@@ -0,0 +1,41 @@
+from datetime import datetime
+from . import db
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(64), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100))
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    # Foreign Keys
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+
+    @property
+    def chunk_count(self):
+        """Number of chunks needed to cover total_size"""
+        if self.total_size == 0:
+            return 1
+        return (self.total_size + self.chunk_size - 1) // self.chunk_size
+
+    def expected_chunk_size(self, index):
+        """Exact byte length chunk `index` must have"""
+        if index == self.chunk_count - 1:
+            return self.total_size - index * self.chunk_size
+        return self.chunk_size
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'contentType': self.content_type,
+            'totalSize': self.total_size,
+            'chunkSize': self.chunk_size,
+            'chunkCount': self.chunk_count,
+            'createdAt': self.created_at.isoformat(),
+            'expiresAt': self.expires_at.isoformat()
+        }
@@ -1,9 +1,14 @@
 from datetime import datetime
-from . import db, bcrypt
-from sqlalchemy import Column, String, Boolean
+from . import db
+from sqlalchemy import Column, String, Boolean, DDL, event
+from utils.password_hasher import hash_password, check_password, needs_rehash
 
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Keyset pagination of the admin listing (UserService.list_users)
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -15,23 +20,71 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     two_factor_enabled = Column(Boolean, default=False)
     two_factor_secret = Column(String, nullable=True)  # Store the secret key for 2FA
+    lockout_until = db.Column(db.DateTime, nullable=True)  # Failed-login counters live in utils.login_throttle
     
     # Relationship
     files = db.relationship('File', backref='owner', lazy=True, cascade='all, delete-orphan')
     shared_files = db.relationship('FileShare', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """Verify password, upgrading the stored hash when BCRYPT_LOG_ROUNDS changed"""
+        if not check_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            # Saved with the caller's next commit
+            self.set_password(password)
+        return True
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'name': self.display_name or self.email.split('@')[0],
-            'role': self.role,
-            'status': self.status,
-            'createdAt': self.created_at.isoformat()
-        }
+        return user_dict(self)
+
+def user_dict(user):
+    """API shape of a User, or of a row carrying the same columns"""
+    return {
+        'id': user.id,
+        'email': user.email,
+        'name': user.display_name or user.email.split('@')[0],
+        'role': user.role,
+        'status': user.status,
+        'createdAt': user.created_at.isoformat()
+    }
+
+# Search index over email and display name (see UserService.search_users).
+# SQLite: contentless FTS5 table kept in sync by triggers. Only the part of
+# the email before the @ is indexed: the domain is the same for everyone.
+# PostgreSQL: trigram GIN indexes, which serve ILIKE '%q%'.
+# The matching Alembic revision is 0b8d3e5f7a21.
+USER_SEARCH_DDL = {
+    'sqlite': [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+            email_local, display_name, content='', prefix='1 2 3')""",
+        """CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts(rowid, email_local, display_name)
+            VALUES (new.id, CASE WHEN instr(new.email, '@') > 0 THEN substr(new.email, 1, instr(new.email, '@') - 1) ELSE new.email END, new.display_name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, email_local, display_name)
+            VALUES ('delete', old.id, CASE WHEN instr(old.email, '@') > 0 THEN substr(old.email, 1, instr(old.email, '@') - 1) ELSE old.email END, old.display_name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF email, display_name ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, email_local, display_name)
+            VALUES ('delete', old.id, CASE WHEN instr(old.email, '@') > 0 THEN substr(old.email, 1, instr(old.email, '@') - 1) ELSE old.email END, old.display_name);
+            INSERT INTO users_fts(rowid, email_local, display_name)
+            VALUES (new.id, CASE WHEN instr(new.email, '@') > 0 THEN substr(new.email, 1, instr(new.email, '@') - 1) ELSE new.email END, new.display_name);
+        END""",
+    ],
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_users_display_name_trgm ON users USING gin (display_name gin_trgm_ops)",
+    ],
+}
+
+# Also set up by db.create_all()
+for _dialect, _statements in USER_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(User.__table__, 'after_create', DDL(_statement).execute_if(dialect=_dialect))
+event.listen(User.__table__, 'before_drop', DDL("DROP TABLE IF EXISTS users_fts").execute_if(dialect='sqlite'))
@@ -1,4 +1,7 @@
-from models import db, FileShare, User, File
+from sqlalchemy.exc import IntegrityError
+from models import db, FileShare, User, File, FileChange
+from models.file import shared_user_dict
+from services.change_log_service import ChangeLogService
 
 class ACLService:
     @staticmethod
@@ -26,6 +29,7 @@ class ACLService:
             existing_share.can_view = can_view
             existing_share.can_edit = can_edit
             existing_share.can_delete = can_delete
+            recipient_action = FileChange.UPDATED
         else:
             # Create new share
             share = FileShare(
@@ -35,21 +39,26 @@ class ACLService:
                 can_edit=can_edit,
                 can_delete=can_delete
             )
+            share.copy_sort_keys(file)
             db.session.add(share)
+            recipient_action = FileChange.SHARED
             
         # Update file shared status
         file.is_shared = True
-        db.session.commit()
+        file.acl_version = File.acl_version + 1
+        ChangeLogService.record(file_id, FileChange.UPDATED, [owner_id])
+        ChangeLogService.record(file_id, recipient_action, [recipient.id])
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent request created the share first: update that one instead
+            db.session.rollback()
+            if existing_share:
+                raise
+            return ACLService.share_file(file_id, owner_id, recipient_email, can_view, can_edit, can_delete)
         
-        # Get updated file with shared users
-        file = File.query.get(file_id)
-        shared_users = [{
-            "id": share.user.id,
-            "email": share.user.email,
-            "canView": share.can_view,
-            "canEdit": share.can_edit,
-            "canDelete": share.can_delete,
-        } for share in file.shared_users]
+        # Get updated shared users
+        shared_users = ACLService.load_shared_users([file_id]).get(file_id, [])
         
         return True, {"message": f"File shared with {recipient_email}", "sharedUsers": shared_users}
     
@@ -82,18 +91,15 @@ class ACLService:
             remaining_shares = FileShare.query.filter_by(file_id=file_id).count()
             if remaining_shares <= 1:  # 1 because we haven't committed the delete yet
                 file.is_shared = False
+            file.acl_version = File.acl_version + 1
                 
+            ChangeLogService.record(file_id, FileChange.REVOKED, [user_id])
+            ChangeLogService.record(file_id, FileChange.UPDATED, [file.owner_id])
+            
             db.session.commit()
             
             # Get updated shared users list
-            updated_shares = FileShare.query.filter_by(file_id=file_id).all()
-            shared_users = [{
-                "id": share.user.id,
-                "email": share.user.email,
-                "canView": share.can_view,
-                "canEdit": share.can_edit,
-                "canDelete": share.can_delete,
-            } for share in updated_shares]
+            shared_users = ACLService.load_shared_users([file_id]).get(file_id, [])
             
             return True, {"message": "Share revoked successfully", "sharedUsers": shared_users}
             
@@ -110,19 +116,46 @@ class ACLService:
             return False, "File not found or you don't have permission"
 
         # Retrieve shared users
-        shares = FileShare.query.filter_by(file_id=file_id).all()
-        if not shares:
-            return True, []  # No users shared with this file
+        return True, ACLService.load_shared_users([file_id]).get(file_id, [])
+
+    @staticmethod
+    def get_shared_users_batch(owner_id, file_ids=None):
+        """
+        Get the shared users of many files owned by owner_id, or of all
+        their shared files when file_ids is None, in at most two queries.
+        Returns: (success, {file_id: [shared users]}) or (False, message)
+        """
+        if file_ids is None:
+            return True, ACLService.load_shared_users(owner_id=owner_id)
+
+        owned_ids = {
+            file_id for (file_id,) in db.session.query(File.id).filter(
+                File.id.in_(file_ids), File.owner_id == owner_id
+            )
+        }
+        missing = [file_id for file_id in file_ids if file_id not in owned_ids]
+        if missing:
+            return False, f"Files not found or you don't have permission: {missing}"
 
-        shared_users = [
-            {
-                "id": share.user.id,
-                "email": share.user.email,
-                "canView": share.can_view,
-                "canEdit": share.can_edit,
-                "canDelete": share.can_delete,
-            }
-            for share in shares
-        ]
+        shared_users = ACLService.load_shared_users(file_ids)
+        return True, {file_id: shared_users.get(file_id, []) for file_id in file_ids}
+
+    @staticmethod
+    def load_shared_users(file_ids=None, owner_id=None):
+        """Shares of the given files (or of every file of owner_id) with their
+        users, in a single joined query: {file_id: [shared users]}"""
+        query = db.session.query(FileShare, User).join(User, User.id == FileShare.user_id)
+        if file_ids is not None:
+            query = query.filter(FileShare.file_id.in_(file_ids))
+        if owner_id is not None:
+            query = query.join(File, File.id == FileShare.file_id).filter(File.owner_id == owner_id)
 
-        return True, shared_users
+        # Sorted here rather than in SQL: each file has few shares, and an
+        # ORDER BY would sort every row of the batch in a temporary B-tree
+        shares_by_file = {}
+        for share, user in query:
+            shares_by_file.setdefault(share.file_id, []).append((share, user))
+        return {
+            file_id: [shared_user_dict(share, user) for share, user in sorted(rows, key=lambda row: row[0].id)]
+            for file_id, rows in sorted(shares_by_file.items())
+        }
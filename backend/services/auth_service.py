@@ -1,5 +1,9 @@
 from models import db, User
-from flask_jwt_extended import create_access_token
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from flask_jwt_extended import create_access_token, create_refresh_token
+from utils.password_hasher import PasswordHasherBusy
+from utils.db_routing import remember_write
 import logging
 import re
 
@@ -38,6 +42,9 @@ class AuthService:
             
             return user, None
             
+        except PasswordHasherBusy:
+            db.session.rollback()
+            raise
         except Exception as e:
             logger.exception("Error in register_user")
             db.session.rollback()
@@ -65,6 +72,31 @@ class AuthService:
             
             return user, access_token, None
             
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             logger.exception("Error in login_user")
-            return None, None, f"Erreur lors de la connexion: {str(e)}"
\ No newline at end of file
+            return None, None, f"Erreur lors de la connexion: {str(e)}"
+
+    @staticmethod
+    def start_lockout(user_id, seconds):
+        """
+        Lock an account for `seconds`; the only write a failed login makes.
+        A single conditional UPDATE, so concurrent workers can't extend or
+        overwrite a lockout that is already running.
+        """
+        now = datetime.utcnow()
+        User.query.filter(
+            User.id == user_id,
+            or_(User.lockout_until.is_(None), User.lockout_until <= now)
+        ).update({User.lockout_until: now + timedelta(seconds=seconds)}, synchronize_session=False)
+        db.session.commit()
+
+    @staticmethod
+    def issue_tokens(user):
+        """Short-lived access token and the refresh token that renews it"""
+        identity = str(user.id)
+        # Login and registration write without a token in the request:
+        # start the new session's reads on the primary
+        remember_write(identity)
+        return create_access_token(identity=identity), create_refresh_token(identity=identity)
@@ -0,0 +1,71 @@
+import os
+from sqlalchemy.exc import IntegrityError
+from models import db, Blob
+from utils.security import get_file_hash
+from utils.file_handling import (
+    get_blob_path, move_to_blob_store, delete_file, remove_after_commit, remove_after_rollback
+)
+
+STORE_ATTEMPTS = 3
+
+class BlobService:
+    @staticmethod
+    def store(file_path, file_hash=None):
+        """
+        Add a freshly written file to the blob store and take a reference on it.
+        If a blob with the same content already exists the new copy is dropped,
+        so duplicate uploads cost no extra disk.
+        The caller owns the transaction and must commit; if it rolls back
+        instead, the content moved into the store here is deleted.
+        """
+        if file_hash is None:
+            file_hash = get_file_hash(file_path)
+
+        blob = BlobService.acquire(file_hash)
+        if blob:
+            delete_file(file_path)
+            return blob
+
+        size = os.path.getsize(file_path)
+        blob_path = move_to_blob_store(file_path, file_hash)
+        for _ in range(STORE_ATTEMPTS):
+            try:
+                with db.session.begin_nested():
+                    blob = Blob(hash=file_hash, path=blob_path, size=size, ref_count=1)
+                    db.session.add(blob)
+            except IntegrityError:
+                # Same content stored concurrently; the file we moved is identical
+                blob = BlobService.acquire(file_hash)
+                if blob:
+                    return blob
+                # That writer rolled back before we could reference its row
+                continue
+            remove_after_rollback(blob_path)
+            return blob
+        raise RuntimeError(f"Could not store blob {file_hash}: concurrent writers kept conflicting")
+
+    @staticmethod
+    def release(file_hash):
+        """
+        Drop a reference on a blob and delete its content once unreferenced.
+        The caller owns the transaction and must commit; the content is only
+        deleted once that commit succeeds.
+        """
+        Blob.query.filter_by(hash=file_hash).update({Blob.ref_count: Blob.ref_count - 1})
+        deleted = Blob.query.filter(Blob.hash == file_hash, Blob.ref_count <= 0).delete()
+        if deleted:
+            remove_after_commit(get_blob_path(file_hash))
+        return bool(deleted)
+
+    @staticmethod
+    def exists(file_hash):
+        """Whether a blob holds this content; a read only, unlike acquire"""
+        return db.session.query(Blob.hash).filter_by(hash=file_hash).first() is not None
+
+    @staticmethod
+    def acquire(file_hash):
+        """Atomically take a reference on an existing blob, if there is one"""
+        updated = Blob.query.filter_by(hash=file_hash).update({Blob.ref_count: Blob.ref_count + 1})
+        if not updated:
+            return None
+        return Blob.query.filter_by(hash=file_hash).first()
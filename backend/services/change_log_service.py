@@ -0,0 +1,122 @@
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from models import db, FileChange, FileChangeSequence
+from utils.pagination import parse_limit
+from utils.event_hub import event_hub
+
+PENDING_EVENTS_KEY = 'pending_file_events'
+UNSEQUENCED_KEY = 'unsequenced_file_changes'
+
+class ChangeLogService:
+    @staticmethod
+    def record(file_id, action, user_ids):
+        """
+        Append a change for every user in user_ids.
+        Called inside the mutation's transaction; the caller commits.
+        """
+        # Event hub subscriptions are keyed by int: JWT identities are strings
+        for user_id in {int(user_id) for user_id in user_ids}:
+            db.session.add(FileChange(user_id=user_id, file_id=file_id, action=action))
+
+    @staticmethod
+    def allocate_seq(count):
+        """
+        Reserve `count` feed positions; returns the first. The counter row
+        stays locked until the transaction ends, which is what orders the
+        positions by commit: call it as late as possible.
+        """
+        for _ in range(2):
+            updated = FileChangeSequence.query.filter_by(id=1).update(
+                {FileChangeSequence.value: FileChangeSequence.value + count}, synchronize_session=False
+            )
+            if updated:
+                value = db.session.query(FileChangeSequence.value).filter_by(id=1).scalar()
+                return value - count + 1
+            # First change ever: create the counter past any existing seq
+            try:
+                with db.session.begin_nested():
+                    start = db.session.query(db.func.max(FileChange.seq)).scalar() or 0
+                    db.session.add(FileChangeSequence(id=1, value=start))
+            except IntegrityError:
+                # Created concurrently
+                pass
+        raise RuntimeError("file_change_sequence row is missing")
+
+    @staticmethod
+    def get_changes(user_id, cursor=None, limit=None):
+        """
+        Changes visible to a user after `cursor`, oldest first.
+        Without a cursor nothing is replayed: the client gets the current
+        cursor and must do one full listing first (reset=True).
+        Created/updated/shared entries carry the current file, except when it
+        has since been deleted or is no longer visible to the user.
+        """
+        if cursor is None:
+            latest = db.session.query(db.func.max(FileChange.seq)).filter(
+                FileChange.user_id == user_id
+            ).scalar()
+            return {"changes": [], "cursor": latest or 0, "hasMore": False, "reset": True}
+
+        limit = parse_limit(limit)
+        changes = FileChange.query.filter(
+            FileChange.user_id == user_id, FileChange.seq > cursor
+        ).order_by(FileChange.seq).limit(limit + 1).all()
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        # Current state of the files still visible, serialized in one batch
+        from services.file_service import FileService
+        file_ids = list({
+            change.file_id for change in changes
+            if change.action in (FileChange.CREATED, FileChange.UPDATED, FileChange.SHARED)
+        })
+        files = FileService.get_viewable_files(user_id, file_ids) if file_ids else []
+        serialized = dict(zip([file.id for file in files], FileService.serialize_files(files)))
+
+        entries = []
+        for change in changes:
+            entry = change.to_dict()
+            entry['file'] = serialized.get(change.file_id) if change.action in (
+                FileChange.CREATED, FileChange.UPDATED, FileChange.SHARED
+            ) else None
+            entries.append(entry)
+
+        return {
+            "changes": entries,
+            "cursor": changes[-1].seq if changes else cursor,
+            "hasMore": has_more,
+            "reset": False
+        }
+
+
+# Number the transaction's changes last thing before it commits
+@event.listens_for(db.session, 'before_flush')
+def _collect_unsequenced_changes(session, flush_context, instances):
+    changes = [obj for obj in session.new if isinstance(obj, FileChange) and obj.seq is None]
+    if changes:
+        session.info.setdefault(UNSEQUENCED_KEY, []).extend(changes)
+
+@event.listens_for(db.session, 'before_commit')
+def _sequence_changes(session):
+    if any(isinstance(obj, FileChange) for obj in session.new):
+        session.flush()
+    changes = session.info.pop(UNSEQUENCED_KEY, [])
+    if not changes:
+        return
+    first = ChangeLogService.allocate_seq(len(changes))
+    for offset, change in enumerate(changes):
+        change.seq = first + offset
+    session.flush()
+    # Push changes to open event streams once, and only if, the commit succeeds
+    session.info[PENDING_EVENTS_KEY] = [(change.user_id, change.to_dict()) for change in changes]
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_file_events(session):
+    for user_id, change in session.info.pop(PENDING_EVENTS_KEY, []):
+        event_hub.publish(user_id, change)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_file_events(session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
+    session.info.pop(UNSEQUENCED_KEY, None)
@@ -1,6 +1,28 @@
 import os
-from models import db, File, FileShare, User
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import contains_eager
+from models import db, File, FileShare, User, FileChange
+from models.file import shared_user_dict
 from utils.file_handling import save_uploaded_file, delete_file
+from utils.upload_pipeline import GENERIC_MIME_TYPES
+from utils.pagination import keyset_page, parse_limit, InvalidCursor
+from services.blob_service import BlobService
+from services.change_log_service import ChangeLogService
+
+FILE_SORT_COLUMNS = {
+    'name': File.name,
+    'size': File.size,
+    'created_at': File.created_at,
+    'type': File.type
+}
+
+# Shared listings sort on the copies kept in file_shares
+SHARED_SORT_COLUMNS = {
+    'name': FileShare.file_name,
+    'size': FileShare.file_size,
+    'created_at': FileShare.file_created_at,
+    'type': FileShare.file_type
+}
 
 class FileService:
     @staticmethod
@@ -11,26 +33,128 @@ class FileService:
     @staticmethod
     def get_shared_files(user_id):
         """Get all files shared with a user"""
-        shares = FileShare.query.filter_by(user_id=user_id, can_view=True).all()
-        file_ids = [share.file_id for share in shares]
-        return File.query.filter(File.id.in_(file_ids)).all() if file_ids else []
+        return File.query.join(FileShare, FileShare.file_id == File.id).filter(
+            FileShare.user_id == user_id, FileShare.can_view.is_(True)
+        ).all()
+    
+    @staticmethod
+    def list_files(user_id, scope='owned', sort='created_at', order='desc', limit=None,
+                   cursor=None, file_type=None, min_size=None, max_size=None,
+                   created_after=None, created_before=None):
+        """
+        One keyset-paginated page of the user's own or shared files.
+        Returns: (success, {"files": [...], "nextCursor": str|None}) or (False, message)
+        """
+        if sort not in FILE_SORT_COLUMNS:
+            return False, f"Invalid sort, expected one of: {', '.join(FILE_SORT_COLUMNS)}"
+        if order not in ('asc', 'desc'):
+            return False, "Invalid order, expected asc or desc"
+        
+        if scope == 'owned':
+            query = File.query.filter(File.owner_id == user_id)
+            columns, id_column = FILE_SORT_COLUMNS, File.id
+        elif scope == 'shared':
+            # Page through the shares, in the order of one of their indexes
+            query = FileShare.query.join(File, FileShare.file_id == File.id).options(
+                contains_eager(FileShare.shared_file)
+            ).filter(FileShare.user_id == user_id, FileShare.can_view.is_(True))
+            columns, id_column = SHARED_SORT_COLUMNS, FileShare.file_id
+        else:
+            return False, "Invalid scope, expected owned or shared"
+        
+        if file_type:
+            # "image/" matches every image type
+            if file_type.endswith('/'):
+                query = query.filter(columns['type'].startswith(file_type, autoescape=True))
+            else:
+                query = query.filter(columns['type'] == file_type)
+        if min_size is not None:
+            query = query.filter(columns['size'] >= min_size)
+        if max_size is not None:
+            query = query.filter(columns['size'] <= max_size)
+        if created_after is not None:
+            query = query.filter(columns['created_at'] >= created_after)
+        if created_before is not None:
+            query = query.filter(columns['created_at'] < created_before)
+        
+        try:
+            rows, next_cursor = keyset_page(
+                query, columns[sort], id_column, sort, order == 'desc',
+                parse_limit(limit), cursor
+            )
+        except InvalidCursor as e:
+            return False, str(e)
+        files = [share.shared_file for share in rows] if scope == 'shared' else rows
+        
+        return True, {"files": FileService.serialize_files(files), "nextCursor": next_cursor}
+    
+    @staticmethod
+    def serialize_files(files):
+        """
+        Serialize many files with a fixed number of queries: one for the
+        shares of the shared files and one for every owner and share user,
+        however many files there are.
+        """
+        shared_ids = [file.id for file in files if file.is_shared]
+        shares = FileShare.query.filter(FileShare.file_id.in_(shared_ids)).all() if shared_ids else []
+        
+        user_ids = {file.owner_id for file in files} | {share.user_id for share in shares}
+        users = {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()} if user_ids else {}
+        
+        shares_by_file = {}
+        for share in shares:
+            user = users.get(share.user_id)
+            if user:
+                shares_by_file.setdefault(share.file_id, []).append(shared_user_dict(share, user))
+        
+        return [
+            file.to_dict(
+                owner=users.get(file.owner_id),
+                shared_users=shares_by_file.get(file.id, []) if file.is_shared else []
+            )
+            for file in files
+        ]
+    
+    @staticmethod
+    def get_viewable_files(user_id, file_ids):
+        """Get the files among file_ids the user owns or may view, in one query"""
+        return File.query.outerjoin(
+            FileShare, and_(FileShare.file_id == File.id, FileShare.user_id == user_id)
+        ).filter(
+            File.id.in_(file_ids),
+            or_(File.owner_id == user_id, FileShare.can_view.is_(True))
+        ).all()
     
     @staticmethod
     def upload_file(user_id, file_obj):
         """Upload a new file"""
-        file_path, file_size = save_uploaded_file(file_obj)
+        file_path, info = save_uploaded_file(file_obj)
+        blob = BlobService.store(file_path, info['sha256'])
         
+        # Prefer the sniffed type when the browser sends a generic one
+        content_type = file_obj.content_type
+        if content_type in GENERIC_MIME_TYPES:
+            content_type = info['mimeType']
+        
+        return FileService.create_file(user_id, file_obj.filename, content_type, blob)
+    
+    @staticmethod
+    def create_file(user_id, name, content_type, blob):
+        """Create a file record pointing at a referenced blob"""
         # Create file record
         file = File(
-            name=file_obj.filename,
-            path=file_path,
-            type=file_obj.content_type,
-            size=file_size,
+            name=name,
+            path=blob.path,
+            type=content_type or 'application/octet-stream',
+            size=blob.size,
             owner_id=user_id,
+            blob_hash=blob.hash,
             is_shared=False
         )
         
         db.session.add(file)
+        db.session.flush()
+        ChangeLogService.record(file.id, FileChange.CREATED, [user_id])
         db.session.commit()
         
         return file
@@ -42,12 +166,20 @@ class FileService:
         if not file:
             return False, "File not found"
         
-        # Delete physical file
-        if file.path and os.path.exists(file.path):
+        blob_hash = file.blob_hash
+        ChangeLogService.record(
+            file.id, FileChange.DELETED, [file.owner_id] + [share.user_id for share in file.shares]
+        )
+        
+        # Delete physical file, unless it is shared content in the blob store
+        if not blob_hash and file.path and os.path.exists(file.path):
             delete_file(file.path)
             
         # Delete from database
         db.session.delete(file)
+        if blob_hash:
+            db.session.flush()
+            BlobService.release(blob_hash)
         db.session.commit()
         
         return True, "File deleted"
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, UploadSession
+from services.file_service import FileService
+from services.blob_service import BlobService
+from utils.security import generate_secure_token, get_files_hash
+from utils.file_handling import (
+    save_chunk, list_received_chunks, assemble_chunks, get_chunk_path, get_session_dir, remove_after_commit
+)
+
+class UploadService:
+    @staticmethod
+    def create_session(user_id, filename, total_size, content_type=None, chunk_size=None):
+        """Open a resumable upload session"""
+        if not filename:
+            return False, "Filename is required"
+        if not isinstance(total_size, int) or total_size < 0:
+            return False, "Invalid total size"
+        if total_size > current_app.config['MAX_UPLOAD_SIZE']:
+            return False, "File too large"
+
+        max_chunk_size = current_app.config['UPLOAD_CHUNK_SIZE']
+        chunk_size = chunk_size or max_chunk_size
+        if not isinstance(chunk_size, int) or chunk_size <= 0 or chunk_size > max_chunk_size:
+            return False, f"Chunk size must be between 1 and {max_chunk_size} bytes"
+
+        session = UploadSession(
+            id=generate_secure_token(16),
+            filename=filename,
+            content_type=content_type,
+            total_size=total_size,
+            chunk_size=chunk_size,
+            owner_id=user_id,
+            expires_at=datetime.utcnow() + timedelta(seconds=current_app.config['UPLOAD_SESSION_TTL'])
+        )
+        db.session.add(session)
+        db.session.commit()
+
+        return True, session
+
+    @staticmethod
+    def get_session(session_id, user_id):
+        """Get an upload session owned by the user, if still valid"""
+        session = UploadSession.query.filter_by(id=session_id, owner_id=user_id).first()
+        if not session:
+            return None
+        if session.expires_at < datetime.utcnow():
+            UploadService.abort(session)
+            return None
+        return session
+
+    @staticmethod
+    def write_chunk(session, index, stream, content_length):
+        """Store chunk `index` of a session; chunks may arrive in any order"""
+        if index < 0 or index >= session.chunk_count:
+            return False, "Chunk index out of range"
+
+        expected = session.expected_chunk_size(index)
+        if content_length is not None and content_length != expected:
+            return False, f"Chunk {index} must be {expected} bytes"
+
+        written = save_chunk(stream, session.id, index, expected)
+        if written != expected:
+            return False, f"Chunk {index} must be {expected} bytes, got {written}"
+
+        return True, UploadService.get_status(session)
+
+    @staticmethod
+    def get_status(session):
+        """Describe which byte ranges of the session have been received"""
+        received = list_received_chunks(session.id)
+        complete = [
+            index for index, size in sorted(received.items())
+            if index < session.chunk_count and size == session.expected_chunk_size(index)
+        ]
+        missing = sorted(set(range(session.chunk_count)) - set(complete))
+
+        status = session.to_dict()
+        status.update({
+            'receivedChunks': complete,
+            'missingChunks': missing,
+            'receivedRanges': [
+                [index * session.chunk_size, index * session.chunk_size + session.expected_chunk_size(index)]
+                for index in complete
+            ],
+            'receivedBytes': sum(session.expected_chunk_size(index) for index in complete),
+            'complete': not missing
+        })
+        return status
+
+    @staticmethod
+    def finalize(session):
+        """Assemble the received chunks into a File owned by the session owner"""
+        status = UploadService.get_status(session)
+        if not status['complete']:
+            return False, f"Missing chunks: {status['missingChunks']}"
+
+        # Hash the parts in place first: a duplicate never gets assembled.
+        # The copy runs before any write: on SQLite even an UPDATE matching
+        # no row takes the database write lock, blocking every other writer.
+        file_hash = get_files_hash(
+            [get_chunk_path(session.id, index) for index in range(session.chunk_count)]
+        )
+        file_path = None
+        if not BlobService.exists(file_hash):
+            file_path, _ = assemble_chunks(session.id, session.chunk_count, session.filename)
+
+        blob = None if file_path else BlobService.acquire(file_hash)
+        if not blob:
+            if not file_path:
+                # The blob was released meanwhile: end the write before copying
+                db.session.rollback()
+                file_path, _ = assemble_chunks(session.id, session.chunk_count, session.filename)
+            blob = BlobService.store(file_path, file_hash)
+
+        # Chunks go with the session row: a failed commit leaves both to resume
+        remove_after_commit(get_session_dir(session.id))
+        db.session.delete(session)
+        file = FileService.create_file(session.owner_id, session.filename, session.content_type, blob)
+
+        return True, file
+
+    @staticmethod
+    def abort(session):
+        """Discard an upload session and its chunks"""
+        remove_after_commit(get_session_dir(session.id))
+        db.session.delete(session)
+        db.session.commit()
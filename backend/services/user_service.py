@@ -0,0 +1,155 @@
+import re
+from sqlalchemy import case, func, or_, text
+from models import db, User
+from models.user import user_dict
+from utils.pagination import keyset_page, parse_limit, InvalidCursor
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+# Matches read from the FTS index per branch before ranking and exclusions
+SEARCH_CANDIDATES = 200
+
+USER_SORT_COLUMNS = {
+    'created_at': User.created_at,
+    'email': User.email
+}
+
+# Everything user_dict needs, and nothing else
+USER_LIST_COLUMNS = (User.id, User.email, User.display_name, User.role, User.status, User.created_at)
+
+def _like_escape(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+class UserService:
+    @staticmethod
+    def list_users(role=None, status=None, created_after=None, created_before=None,
+                   sort='created_at', order='desc', limit=None, cursor=None):
+        """
+        One keyset-paginated page of users. Only the listed columns are
+        selected: rows are never hydrated into User entities.
+        Returns: (success, {"users": [...], "nextCursor": str|None}) or (False, message)
+        """
+        if sort not in USER_SORT_COLUMNS:
+            return False, f"Invalid sort, expected one of: {', '.join(USER_SORT_COLUMNS)}"
+        if order not in ('asc', 'desc'):
+            return False, "Invalid order, expected asc or desc"
+        
+        query = db.session.query(*USER_LIST_COLUMNS)
+        if role:
+            query = query.filter(User.role == role)
+        if status:
+            query = query.filter(User.status == status)
+        if created_after is not None:
+            query = query.filter(User.created_at >= created_after)
+        if created_before is not None:
+            query = query.filter(User.created_at < created_before)
+        
+        try:
+            rows, next_cursor = keyset_page(
+                query, USER_SORT_COLUMNS[sort], User.id, sort, order == 'desc',
+                parse_limit(limit), cursor
+            )
+        except InvalidCursor as e:
+            return False, str(e)
+        
+        return True, {"users": [user_dict(row) for row in rows], "nextCursor": next_cursor}
+
+    @staticmethod
+    def get_stats():
+        """User counts by role and status: one aggregate query, whatever the head-count"""
+        rows = db.session.query(User.role, User.status, func.count(User.id)) \
+            .group_by(User.role, User.status) \
+            .all()
+        by_role = {}
+        by_status = {}
+        for role, status, count in rows:
+            by_role[role] = by_role.get(role, 0) + count
+            by_status[status] = by_status.get(status, 0) + count
+        return {
+            "user_count": sum(by_role.values()),
+            "by_role": by_role,
+            "by_status": by_status
+        }
+
+    @staticmethod
+    def parse_search_limit(value):
+        try:
+            limit = int(value) if value else SEARCH_LIMIT
+        except ValueError:
+            limit = SEARCH_LIMIT
+        return max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    @staticmethod
+    def search_users(query, exclude_user_id, limit=SEARCH_LIMIT):
+        """
+        Users whose email or display name matches `query`, best first: names
+        and emails starting with the query, then by index relevance. The
+        caller is excluded in SQL. An empty query returns the first users by
+        email, still limited.
+        """
+        query = (query or '').strip()
+        if not query:
+            return User.query.filter(User.id != exclude_user_id).order_by(User.email).limit(limit).all()
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'sqlite':
+            return UserService._search_fts(query, exclude_user_id, limit)
+        return UserService._search_like(query, exclude_user_id, limit, trigram=dialect == 'postgresql')
+
+    @staticmethod
+    def _search_fts(query, exclude_user_id, limit):
+        # Every word as a prefix, "ahm ben" -> "ahm"* "ben"*. The index only
+        # holds the part of the email before the @, so ignore the domain.
+        words = re.findall(r'\w+', query.split('@', 1)[0])
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+        # Same, with the first word at the start of the name or email
+        start_match = '^' + match
+
+        # Each branch stops after SEARCH_CANDIDATES rows, so a one-letter
+        # query costs the same as a precise one; no full sort of the matches
+        statement = text("""
+            SELECT users.* FROM (
+                SELECT id, MIN(priority) AS priority, MIN(rank) AS rank FROM (
+                    SELECT * FROM (SELECT rowid AS id, 0 AS priority, rank FROM users_fts
+                                   WHERE users_fts MATCH :start_match LIMIT :candidates)
+                    UNION ALL
+                    SELECT * FROM (SELECT rowid AS id, 1 AS priority, rank FROM users_fts
+                                   WHERE users_fts MATCH :match LIMIT :candidates)
+                ) GROUP BY id
+            ) AS matches
+            JOIN users ON users.id = matches.id
+            WHERE users.id != :exclude_user_id
+            ORDER BY matches.priority, matches.rank, users.email
+            LIMIT :limit
+        """)
+        return db.session.query(User).from_statement(statement).params(
+            match=match,
+            start_match=start_match,
+            candidates=SEARCH_CANDIDATES,
+            exclude_user_id=exclude_user_id,
+            limit=limit
+        ).all()
+
+    @staticmethod
+    def _search_like(query, exclude_user_id, limit, trigram):
+        escaped = _like_escape(query)
+        contains = f"%{escaped}%"
+        prefix = f"{escaped}%"
+        prefix_first = case(
+            (or_(User.email.ilike(prefix, escape='\\'), User.display_name.ilike(prefix, escape='\\')), 0),
+            else_=1
+        )
+        order = [prefix_first]
+        if trigram:
+            order.append(func.greatest(
+                func.similarity(User.email, query),
+                func.similarity(func.coalesce(User.display_name, ''), query)
+            ).desc())
+        order.append(User.email)
+
+        return User.query.filter(
+            User.id != exclude_user_id,
+            or_(User.email.ilike(contains, escape='\\'), User.display_name.ilike(contains, escape='\\'))
+        ).order_by(*order).limit(limit).all()
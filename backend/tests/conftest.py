@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from app import create_app
+from flask_jwt_extended import create_access_token
+from models import db, User
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    DATABASE_REPLICA_URI = None
+    UPLOAD_FOLDER = tempfile.mkdtemp()
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    """make_user(email) -> (user, Authorization headers for it)"""
+    def make(email):
+        user = User(email=email, display_name=email.split('@')[0])
+        user.set_password('password')
+        db.session.add(user)
+        db.session.commit()
+        return user, {'Authorization': f"Bearer {create_access_token(identity=str(user.id))}"}
+    return make
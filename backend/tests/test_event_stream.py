@@ -0,0 +1,14 @@
+import io
+from utils.event_hub import event_hub
+
+def test_upload_wakes_the_owners_event_stream(client, make_user):
+    user, headers = make_user('owner@inpt.ma')
+    subscription = event_hub.subscribe(user.id)
+    try:
+        response = client.post('/api/files', headers=headers, data={
+            'file': (io.BytesIO(b'hello'), 'hello.txt')
+        })
+        assert response.status_code == 201
+        assert subscription.wait(0)
+    finally:
+        event_hub.unsubscribe(subscription)
@@ -0,0 +1,53 @@
+import pytest
+from models import db, File, FileShare
+from utils.query_stats import assert_max_queries
+
+# Whatever the number of files: revocation list sync, user lookup, both
+# lists, then the shares and users of every listed file in one batch
+FILE_LISTING_QUERIES = 6
+
+def add_files(owner, count, shared_with=()):
+    files = []
+    for index in range(count):
+        file = File(name=f'file{index}.txt', path=f'/tmp/file{index}.txt', size=index,
+                    owner_id=owner.id, is_shared=bool(shared_with))
+        db.session.add(file)
+        db.session.flush()
+        for user in shared_with:
+            db.session.add(FileShare(file_id=file.id, user_id=user.id))
+        files.append(file)
+    db.session.commit()
+    return files
+
+@pytest.mark.parametrize('count', [1, 25])
+def test_file_listing_query_count_does_not_grow(client, make_user, count):
+    owner, headers = make_user('owner@inpt.ma')
+    other, _ = make_user('other@inpt.ma')
+    add_files(owner, count, shared_with=[other])
+    add_files(other, count, shared_with=[owner])
+
+    with assert_max_queries(FILE_LISTING_QUERIES):
+        response = client.get('/api/files', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()['files']) == count
+    assert len(response.get_json()['sharedFiles']) == count
+
+# Revocation list sync, user lookup, ownership of the ids (with ?ids= only),
+# then the shares of every file with their users in one query
+SHARED_USERS_QUERIES = 4
+
+@pytest.mark.parametrize('count', [1, 25])
+def test_shared_users_batch_query_count_does_not_grow(client, make_user, count):
+    owner, headers = make_user('owner@inpt.ma')
+    first, _ = make_user('first@inpt.ma')
+    second, _ = make_user('second@inpt.ma')
+    files = add_files(owner, count, shared_with=[first, second])
+    ids = ','.join(str(file.id) for file in files)
+
+    for url in ('/api/files/shared-users', f'/api/files/shared-users?ids={ids}'):
+        with assert_max_queries(SHARED_USERS_QUERIES):
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        shared_users = response.get_json()['sharedUsers']
+        assert len(shared_users) == count
+        assert all(len(users) == 2 for users in shared_users.values())
@@ -0,0 +1,8 @@
+from utils.query_plans import check_query_plans, describe_findings
+
+def test_hot_queries_read_index_ranges_in_order(app):
+    failures = check_query_plans()
+    assert not failures, '\n'.join(
+        f"{name}: {describe_findings(findings)}\n  {' '.join(statement.split())}"
+        for name, statement, findings, plan in failures
+    )
@@ -0,0 +1,120 @@
+import time
+import logging
+from functools import wraps
+from flask import current_app, g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from models import db
+from models.routing_session import REPLICA_BIND
+from .lru_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+def configure_database(app):
+    """
+    Pool settings for server databases (SQLite keeps SQLAlchemy's defaults)
+    and the replica bind when DATABASE_REPLICA_URI is set. Run before
+    db.init_app; explicit SQLALCHEMY_ENGINE_OPTIONS entries win.
+    """
+    config = app.config
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': config['DB_POOL_PRE_PING'],
+            **config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        }
+    if config.get('DATABASE_REPLICA_URI'):
+        config['SQLALCHEMY_BINDS'] = {
+            **(config.get('SQLALCHEMY_BINDS') or {}),
+            REPLICA_BIND: config['DATABASE_REPLICA_URI'],
+        }
+
+def init_replica_fallback(app):
+    """Watch the replica engine for connection and operational errors"""
+    with app.app_context():
+        replica = db.engines.get(REPLICA_BIND)
+    if replica is not None:
+        event.listen(replica, 'handle_error', _replica_error)
+
+def _replica_error(context):
+    if not (context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError)):
+        return
+    if has_request_context():
+        # Seen by read_replica even if the view swallowed the exception
+        g.replica_failed = True
+        retry_after = current_app.config['REPLICA_RETRY_AFTER']
+        current_app.extensions['replica_down_until'] = time.monotonic() + retry_after
+        logger.warning("Read replica failed, using the primary for %ss: %s", retry_after, context.original_exception)
+
+def replica_available():
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return False
+    return current_app.extensions.get('replica_down_until', 0) <= time.monotonic()
+
+def get_recent_writers():
+    """Identities that committed a write less than REPLICA_READ_YOUR_WRITES_WINDOW ago"""
+    writers = current_app.extensions.get('recent_writers')
+    if writers is None:
+        writers = TTLCache(maxsize=100000, ttl=current_app.config['REPLICA_READ_YOUR_WRITES_WINDOW'])
+        current_app.extensions['recent_writers'] = writers
+    return writers
+
+def remember_write(identity):
+    """Keep `identity` reading from the primary until the replica has caught up"""
+    if identity is not None:
+        get_recent_writers().set(str(identity), True)
+
+def _request_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        # No token verified for this request
+        return None
+
+def read_replica(fn):
+    """
+    Serve the rest of the view from the read replica, if one is configured.
+    Place it under the authentication decorator: the token and user checks
+    stay on the primary. Reads go back to the primary after the session
+    writes, and for REPLICA_READ_YOUR_WRITES_WINDOW seconds after any
+    request of the same user committed one. That window is tracked per
+    process: with several nodes, keep it above the replica lag or pin users
+    to a node.
+    If the replica fails, the view runs again on the primary, and reads stay
+    there for REPLICA_RETRY_AFTER seconds. Views marked with it must not
+    write: they may run twice.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not replica_available():
+            return fn(*args, **kwargs)
+        identity = _request_identity()
+        if identity is not None and get_recent_writers().get(str(identity)) is not None:
+            return fn(*args, **kwargs)
+
+        db.session.info['read_replica'] = True
+        try:
+            result = fn(*args, **kwargs)
+        except OperationalError:
+            if not g.get('replica_failed'):
+                raise
+            result = None
+        if g.pop('replica_failed', False):
+            db.session.rollback()
+            db.session.info.pop('read_replica', None)
+            result = fn(*args, **kwargs)
+        return result
+    return wrapper
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_write(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _remember_writer(session):
+    if session.info.get('wrote') and has_request_context():
+        remember_write(_request_identity())
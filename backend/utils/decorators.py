@@ -1,7 +1,9 @@
 from functools import wraps
-from flask import jsonify, request
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from models import db, User, File, FileShare
+from flask import jsonify, request, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from models import db, File, FileShare
+from .lru_cache import TTLCache
+from .principal_cache import get_principal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,7 +18,8 @@ def jwt_required_with_user(fn):
             # Convertir l'ID en entier pour la recherche dans la base de données
             try:
                 user_id_int = int(user_id)
-                user = User.query.get(user_id_int)
+                # Cached immutable snapshot (id, email, display_name, role, status)
+                user = get_principal(user_id_int, get_jwt().get('iat'))
             except (ValueError, TypeError):
                 logger.error(f"Invalid user ID format: {user_id}")
                 return jsonify({"message": "Invalid user ID"}), 401
@@ -39,6 +42,41 @@ def jwt_required_with_user(fn):
             
     return wrapper
 
+def get_permission_cache():
+    """Per-app cache of (user_id, file_id) -> (ACL stamp, share permissions)"""
+    cache = current_app.extensions.get('permission_cache')
+    if cache is None:
+        cache = TTLCache(
+            maxsize=current_app.config['PERMISSION_CACHE_SIZE'],
+            ttl=current_app.config['PERMISSION_CACHE_TTL']
+        )
+        current_app.extensions['permission_cache'] = cache
+    return cache
+
+def get_share_permissions(user_id, file):
+    """
+    Effective share permissions of a non-owner as a dict, or None if the file
+    is not shared with them. Cached entries are only trusted while the file's
+    acl_version (bumped by every share change) is the one they were read at;
+    created_at is part of the stamp so a deleted file's id reused by a new
+    file never inherits its entries.
+    """
+    cache = get_permission_cache()
+    key = (user_id, file.id)
+    stamp = (file.acl_version, file.created_at)
+    cached = cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    share = FileShare.query.filter_by(file_id=file.id, user_id=user_id).first()
+    permissions = {
+        'view': share.can_view,
+        'edit': share.can_edit,
+        'delete': share.can_delete
+    } if share else None
+    cache.set(key, (stamp, permissions))
+    return permissions
+
 def file_access_required(permission='view'):
     def decorator(fn):
         @wraps(fn)
@@ -53,19 +91,16 @@ def file_access_required(permission='view'):
                     return fn(user, file, *args, **kwargs)
                     
                 # Check shared permissions
-                share = FileShare.query.filter_by(
-                    file_id=file_id, 
-                    user_id=user.id
-                ).first()
+                permissions = get_share_permissions(user.id, file)
                 
-                if not share:
+                if not permissions:
                     return jsonify({"message": "Access denied"}), 403
                     
-                if permission == 'view' and not share.can_view:
+                if permission == 'view' and not permissions['view']:
                     return jsonify({"message": "No view permission"}), 403
-                elif permission == 'edit' and not share.can_edit:
+                elif permission == 'edit' and not permissions['edit']:
                     return jsonify({"message": "No edit permission"}), 403
-                elif permission == 'delete' and not share.can_delete:
+                elif permission == 'delete' and not permissions['delete']:
                     return jsonify({"message": "No delete permission"}), 403
                     
                 return fn(user, file, *args, **kwargs)
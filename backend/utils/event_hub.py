@@ -0,0 +1,84 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+
+class Subscription:
+    """One open event stream; a bounded queue so a stalled client can't grow memory"""
+
+    def __init__(self, user_id, max_pending):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=max_pending)
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def wait(self, timeout):
+        """
+        Block until an event arrives or timeout seconds pass; True if one did.
+        Every pending event is consumed: streams that read the change log
+        only use the hub as a wake-up.
+        """
+        if self.get(timeout) is None:
+            return False
+        while self.get(0) is not None:
+            pass
+        return True
+
+class EventHub:
+    """
+    In-process fan-out of per-user events to open Server-Sent Events streams.
+    Publishing only takes the lock long enough to copy the user's subscriber
+    set; idle subscribers cost a blocked queue read and nothing else. Each
+    worker process has its own hub and only sees its own commits: event
+    streams also read the change log on every heartbeat to catch the rest.
+    """
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.max_pending)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                # Already due to wake up; the stream rereads the change log
+                pass
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+def format_sse(data, event=None, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+event_hub = EventHub()
@@ -2,35 +2,151 @@ import os
 import shutil
 from werkzeug.utils import secure_filename
 from flask import current_app
-from .security import get_unique_filename
+from sqlalchemy import event
+from models import db
+from .metrics import UPLOAD_BYTES
+from .security import get_unique_filename, generate_secure_token
+from .upload_pipeline import UploadPipeline
+
+COPY_BUFFER_SIZE = 64 * 1024
 
 def ensure_upload_folder():
     """Ensure the upload folder exists"""
     os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-def save_uploaded_file(file, filename=None):
+def save_uploaded_file(file):
+    """
+    Save an uploaded file to the configured upload folder.
+    Multipart bodies parsed by UploadRequest are already on disk, so the file
+    is only detached from its pipeline; any other stream is copied through one.
+    Returns: (saved_path, info) where info holds the pipeline stage results
+    (size, sha256, mimeType)
+    """
+    ensure_upload_folder()
+    if isinstance(file.stream, UploadPipeline):
+        return file.stream.detach()
+
+    pipeline = UploadPipeline(file.filename)
+    try:
+        file.stream.seek(0)
+        shutil.copyfileobj(file.stream, pipeline, COPY_BUFFER_SIZE)
+        return pipeline.detach()
+    finally:
+        pipeline.close()
+
+def get_session_dir(session_id):
+    """Directory holding the received chunks of an upload session"""
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], '.sessions', secure_filename(session_id))
+
+def get_chunk_path(session_id, index):
+    return os.path.join(get_session_dir(session_id), f"{index}.part")
+
+def save_chunk(stream, session_id, index, expected_size):
+    """
+    Stream a chunk body to disk without buffering it in memory.
+    The chunk is written to a temporary file and only renamed into place when
+    it has exactly expected_size bytes, so a dropped or concurrent PUT of the
+    same index never leaves a torn part.
+    Returns: number of bytes received
+    """
+    session_dir = get_session_dir(session_id)
+    os.makedirs(session_dir, exist_ok=True)
+    chunk_path = get_chunk_path(session_id, index)
+    tmp_path = f"{chunk_path}.{generate_secure_token(4)}.tmp"
+    written = 0
+    try:
+        with open(tmp_path, 'wb') as out:
+            for block in iter(lambda: stream.read(COPY_BUFFER_SIZE), b""):
+                out.write(block)
+                written += len(block)
+                UPLOAD_BYTES.inc(amount=len(block))
+        if written == expected_size:
+            os.replace(tmp_path, chunk_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return written
+
+def list_received_chunks(session_id):
+    """Return {index: size} for every chunk of the session present on disk"""
+    session_dir = get_session_dir(session_id)
+    if not os.path.isdir(session_dir):
+        return {}
+    received = {}
+    for entry in os.scandir(session_dir):
+        name, ext = os.path.splitext(entry.name)
+        if ext == '.part' and name.isdigit():
+            received[int(name)] = entry.stat().st_size
+    return received
+
+def assemble_chunks(session_id, chunk_count, filename):
     """
-    Save an uploaded file to the configured upload folder
+    Concatenate the chunks of a session, in order, into a new file in the
+    upload folder. The chunks are kept: the session stays resumable until
+    the caller commits and removes them.
     Returns: (saved_path, file_size)
     """
     ensure_upload_folder()
-    print("UPLOAD_FOLDER:", current_app.config['UPLOAD_FOLDER'])
-    print("FILENAME:", file.filename)
-    if filename is None:
-        filename = get_unique_filename(file.filename)
-    else:
-        filename = secure_filename(filename)
-    print("UNIQUE FILENAME:", filename)
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-    print("FILE PATH:", file_path)
-    file.save(file_path)
-    
-    # Get file size
-    file_size = os.path.getsize(file_path)
-    print("FILE SIZE:", file_size)
-    
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], get_unique_filename(filename))
+    with open(file_path, 'wb') as out:
+        for index in range(chunk_count):
+            with open(get_chunk_path(session_id, index), 'rb') as part:
+                shutil.copyfileobj(part, out, COPY_BUFFER_SIZE)
+        file_size = out.tell()
     return file_path, file_size
 
+def get_blob_path(file_hash):
+    """Location of a content-addressed blob, fanned out by hash prefix"""
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'blobs', file_hash[:2], file_hash)
+
+def move_to_blob_store(file_path, file_hash):
+    """Move a freshly written file to its blob location without copying it"""
+    blob_path = get_blob_path(file_hash)
+    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+    os.replace(file_path, blob_path)
+    return blob_path
+
+PENDING_REMOVALS_KEY = 'paths_to_remove'
+ROLLBACK_REMOVALS_KEY = 'paths_to_remove_on_rollback'
+
+def remove_after_commit(path):
+    """
+    Delete a file or directory once the current transaction commits, so
+    rows still pointing at it survive a failed commit together with it.
+    Nothing is deleted if the transaction rolls back.
+    """
+    db.session.info.setdefault(PENDING_REMOVALS_KEY, []).append(path)
+
+def remove_after_rollback(path):
+    """
+    Delete a file written for the current transaction if it rolls back, so
+    no file is left that no row points at. Only the file as it is now goes:
+    if another writer replaces it meanwhile, theirs is kept.
+    """
+    db.session.info.setdefault(ROLLBACK_REMOVALS_KEY, []).append((path, os.stat(path).st_ino))
+
+@event.listens_for(db.session, 'after_commit')
+def _remove_committed_paths(session):
+    session.info.pop(ROLLBACK_REMOVALS_KEY, None)
+    for path in session.info.pop(PENDING_REMOVALS_KEY, []):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            delete_file(path)
+
+# Also runs when a session is closed with its transaction still open, as
+# after a failed commit; anything left after after_commit was rolled back
+@event.listens_for(db.session, 'after_transaction_end')
+def _discard_rolled_back_paths(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(PENDING_REMOVALS_KEY, None)
+        for path, inode in session.info.pop(ROLLBACK_REMOVALS_KEY, []):
+            try:
+                if os.stat(path).st_ino == inode:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
 def delete_file(file_path):
     """Delete a file from the filesystem"""
     if os.path.exists(file_path) and os.path.isfile(file_path):
@@ -0,0 +1,244 @@
+import os
+import zipfile
+from datetime import datetime, timezone
+from urllib.parse import quote
+from flask import Response, request, current_app
+from werkzeug.http import http_date, parse_date, quote_etag, unquote_etag
+from .security import generate_secure_token
+from .metrics import DOWNLOAD_BYTES
+
+STREAM_BUFFER_SIZE = 64 * 1024
+# Requests asking for more ranges than this get the whole file instead
+MAX_RANGES = 32
+
+def get_file_etag(file):
+    """Strong ETag from the content hash, or a weak one for legacy files"""
+    if file.blob_hash:
+        return quote_etag(file.blob_hash)
+    stamp = file.updated_at or file.created_at
+    return quote_etag(f"{file.id}-{file.size}-{int(stamp.timestamp()) if stamp else 0}", weak=True)
+
+def get_file_last_modified(file):
+    stamp = file.updated_at or file.created_at
+    return stamp.replace(tzinfo=timezone.utc, microsecond=0) if stamp else None
+
+def content_disposition(filename):
+    """attachment header carrying both an ASCII fallback and the UTF-8 name"""
+    ascii_name = filename.encode('ascii', 'ignore').decode('ascii').replace('"', '') or 'download'
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+def is_not_modified(etag, last_modified):
+    """Evaluate If-None-Match, then If-Modified-Since (RFC 9110 13.2.2)"""
+    if request.if_none_match:
+        # Weak comparison for If-None-Match
+        return request.if_none_match.contains_weak(unquote_etag(etag)[0])
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+def range_applies(etag, last_modified):
+    """A Range is only honoured if If-Range still matches the stored file"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        # Strong comparison: weak ETags never match
+        return not etag.startswith('W/') and if_range == etag
+    date = parse_date(if_range)
+    return bool(date and last_modified and date == last_modified)
+
+def iter_file_range(path, start, end):
+    """Yield bytes [start, end) of a file in bounded blocks"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(STREAM_BUFFER_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            DOWNLOAD_BYTES.inc('direct', amount=len(block))
+            yield block
+
+def iter_multipart_ranges(path, parts, boundary):
+    for header, start, end in parts:
+        yield header
+        yield from iter_file_range(path, start, end)
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+def offload_headers(file):
+    """
+    Internal-redirect header for the configured DOWNLOAD_MODE, or None when
+    Flask should stream the bytes itself
+    """
+    mode = current_app.config.get('DOWNLOAD_MODE', 'direct')
+    if mode == 'x-sendfile':
+        return {'X-Sendfile': file.path}
+    if mode == 'x-accel':
+        relative_path = os.path.relpath(file.path, current_app.config['UPLOAD_FOLDER'])
+        if relative_path.startswith('..'):
+            return None
+        prefix = current_app.config['X_ACCEL_REDIRECT_PREFIX'].rstrip('/')
+        return {'X-Accel-Redirect': f"{prefix}/{quote(relative_path.replace(os.sep, '/'))}"}
+    return None
+
+def send_stored_file(file, cache_control='private, no-cache'):
+    """
+    Build the download response for a File using only its stored metadata
+    for validators: handles If-None-Match / If-Modified-Since (304), Range
+    and multi-range requests (206) guarded by If-Range, and 416 for
+    unsatisfiable ranges. The file is only opened once bytes are sent.
+    With an offloading DOWNLOAD_MODE only the internal-redirect header is
+    returned once the request has been authorized.
+    Returns None if the content is missing on disk.
+    """
+    size = file.size or 0
+    etag = get_file_etag(file)
+    last_modified = get_file_last_modified(file)
+
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': cache_control,
+        'Content-Disposition': content_disposition(file.name)
+    }
+    if last_modified:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    if is_not_modified(etag, last_modified):
+        del headers['Content-Disposition']
+        return Response(status=304, headers=headers)
+
+    content_type = file.type or 'application/octet-stream'
+
+    # The front proxy serves the bytes, including Range requests
+    redirect = offload_headers(file)
+    if redirect:
+        headers.update(redirect)
+        DOWNLOAD_BYTES.inc('offload', amount=size)
+        return Response(status=200, headers=headers, content_type=content_type)
+
+    ranges = None
+    if (request.range and request.range.units == 'bytes' and len(request.range.ranges) <= MAX_RANGES
+            and range_applies(etag, last_modified)):
+        ranges = []
+        for start, end in request.range.ranges:
+            if start < 0:
+                # Suffix range: last -start bytes
+                start, end = max(size + start, 0), size
+            else:
+                end = size if end is None else min(end, size)
+            if start < end:
+                ranges.append((start, end))
+        if not ranges:
+            headers['Content-Range'] = f"bytes */{size}"
+            return Response(status=416, headers=headers)
+
+    if not os.path.exists(file.path):
+        return None
+
+    if not ranges:
+        headers['Content-Length'] = str(size)
+        return Response(iter_file_range(file.path, 0, size), status=200, headers=headers,
+                        mimetype=content_type, direct_passthrough=True)
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers['Content-Range'] = f"bytes {start}-{end - 1}/{size}"
+        headers['Content-Length'] = str(end - start)
+        return Response(iter_file_range(file.path, start, end), status=206, headers=headers,
+                        mimetype=content_type, direct_passthrough=True)
+
+    boundary = generate_secure_token(16)
+    parts = []
+    length = 0
+    for start, end in ranges:
+        header = (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n"
+        ).encode()
+        parts.append((header, start, end))
+        length += len(header) + end - start
+    length += len(f"\r\n--{boundary}--\r\n")
+    headers['Content-Length'] = str(length)
+    return Response(iter_multipart_ranges(file.path, parts, boundary), status=206, headers=headers,
+                    content_type=f"multipart/byteranges; boundary={boundary}", direct_passthrough=True)
+
+class _ZipSink:
+    """Unseekable write target: zipfile then emits data descriptors and we
+    hand out whatever it has written since the last drain"""
+
+    def __init__(self):
+        self.blocks = []
+
+    def write(self, data):
+        self.blocks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.blocks)
+        self.blocks = []
+        return data
+
+def _member_name(name):
+    """Relative path with no '.', '..' or empty segments: nothing the
+    extracting tool could resolve outside its target directory"""
+    parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+    return '/'.join(parts) or 'file'
+
+def archive_entry_names(names):
+    """Safe member names made unique: 'a.txt', 'a (1).txt', ..."""
+    seen = set()
+    unique = []
+    for name in names:
+        base, ext = os.path.splitext(_member_name(name))
+        candidate, counter = base + ext, 1
+        while candidate in seen:
+            candidate = f"{base} ({counter}){ext}"
+            counter += 1
+        seen.add(candidate)
+        unique.append(candidate)
+    return unique
+
+def iter_zip_archive(entries):
+    """
+    Build a ZIP on the fly from (name, path, modified) entries, one block at
+    a time: memory use does not depend on the archive size. Members are
+    stored uncompressed with ZIP64 headers so files over 4 GB work.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+        for name, path, modified in entries:
+            info = zipfile.ZipInfo(name, (modified or datetime.utcnow()).timetuple()[:6])
+            with archive.open(info, 'w', force_zip64=True) as member:
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(STREAM_BUFFER_SIZE), b""):
+                        member.write(block)
+                        DOWNLOAD_BYTES.inc('direct', amount=len(block))
+                        yield sink.drain()
+            yield sink.drain()
+    yield sink.drain()
+
+def _skip_empty(blocks):
+    # An empty chunk would end a chunked transfer early
+    return (block for block in blocks if block)
+
+def send_zip_archive(files, archive_name='files.zip'):
+    """Stream a ZIP of several File rows; returns None if one is missing on disk"""
+    entries = []
+    names = archive_entry_names([file.name for file in files])
+    for name, file in zip(names, files):
+        if not os.path.exists(file.path):
+            return None
+        entries.append((name, file.path, file.updated_at or file.created_at))
+
+    headers = {
+        'Cache-Control': 'private, no-cache',
+        'Content-Disposition': content_disposition(archive_name)
+    }
+    return Response(_skip_empty(iter_zip_archive(entries)), status=200, headers=headers,
+                    mimetype='application/zip', direct_passthrough=True)
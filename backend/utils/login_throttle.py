@@ -0,0 +1,152 @@
+import math
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from flask import current_app
+
+class ThrottleStore(ABC):
+    """
+    Sliding-window hit counters. The default MemoryThrottleStore is local to
+    the process; set LOGIN_THROTTLE_STORE to a factory returning a shared
+    implementation (e.g. Redis sorted sets) to count across workers.
+    """
+
+    @abstractmethod
+    def hit(self, key, window):
+        """Record a hit now; returns the hits within the last `window` seconds"""
+
+    @abstractmethod
+    def count(self, key, window):
+        """Hits within the last `window` seconds"""
+
+    @abstractmethod
+    def retry_after(self, key, window, limit):
+        """Seconds until fewer than `limit` hits are left in the window (0 if already)"""
+
+    @abstractmethod
+    def reset(self, key):
+        """Forget every hit of `key`"""
+
+class MemoryThrottleStore(ThrottleStore):
+    """
+    In-process store: one deque of timestamps per key, at most `max_hits`
+    long, and at most `max_keys` keys with the least recently hit evicted,
+    so a flood of distinct emails or addresses can't grow memory unbounded.
+    """
+
+    def __init__(self, max_keys=100000, max_hits=100):
+        self.max_keys = max_keys
+        self.max_hits = max_hits
+        self._lock = threading.Lock()
+        self._hits = OrderedDict()
+
+    def _prune(self, hits, now, window):
+        while hits and hits[0] <= now - window:
+            hits.popleft()
+
+    def hit(self, key, window):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque(maxlen=self.max_hits)
+                while len(self._hits) > self.max_keys:
+                    self._hits.popitem(last=False)
+            else:
+                self._hits.move_to_end(key)
+            self._prune(hits, now, window)
+            hits.append(now)
+            return len(hits)
+
+    def count(self, key, window):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            self._prune(hits, now, window)
+            return len(hits)
+
+    def retry_after(self, key, window, limit):
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0
+            self._prune(hits, now, window)
+            if len(hits) < limit:
+                return 0
+            # The window frees up when the limit-th most recent hit leaves it
+            return hits[-limit] + window - now
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+
+class LoginThrottle:
+    """
+    Counts failed logins per email, per client address and email pair, and
+    per address, in memory. Nothing is written to the database until an
+    email reaches its limit; the caller then persists the lockout once (see
+    User.lockout_until). The pair limit stops one client from retrying an
+    account through lockout after lockout, without refusing the other users
+    behind the same address (an office NAT, a misconfigured proxy). The
+    address limit, set well above it, stops one client spraying a few
+    guesses at many emails.
+    """
+
+    def __init__(self, store, window, max_email_failures, max_client_failures, max_ip_failures):
+        self.store = store
+        self.window = window
+        self.max_email_failures = max_email_failures
+        self.max_client_failures = max_client_failures
+        self.max_ip_failures = max_ip_failures
+
+    def _client_key(self, email, ip):
+        return f"client:{ip}:{email.lower()}"
+
+    def _ip_key(self, ip):
+        return f"ip:{ip}"
+
+    def blocked_for(self, email, ip):
+        """Whole seconds this client must wait before trying `email` again, 0 if it needn't"""
+        wait = max(
+            self.store.retry_after(self._client_key(email, ip), self.window, self.max_client_failures),
+            self.store.retry_after(self._ip_key(ip), self.window, self.max_ip_failures)
+        )
+        return math.ceil(wait)
+
+    def record_failure(self, email, ip):
+        """Count a failed attempt; True when the email just reached its limit"""
+        self.store.hit(self._client_key(email, ip), self.window)
+        self.store.hit(self._ip_key(ip), self.window)
+        failures = self.store.hit(f"email:{email.lower()}", self.window)
+        if failures >= self.max_email_failures:
+            self.store.reset(f"email:{email.lower()}")
+            return True
+        return False
+
+    def record_success(self, email):
+        self.store.reset(f"email:{email.lower()}")
+
+_throttle_lock = threading.Lock()
+
+def get_login_throttle():
+    throttle = current_app.extensions.get('login_throttle')
+    if throttle is not None:
+        return throttle
+    with _throttle_lock:
+        throttle = current_app.extensions.get('login_throttle')
+        if throttle is None:
+            config = current_app.config
+            store_factory = config.get('LOGIN_THROTTLE_STORE') or MemoryThrottleStore
+            throttle = LoginThrottle(
+                store=store_factory(),
+                window=config['LOGIN_THROTTLE_WINDOW'],
+                max_email_failures=config['LOGIN_MAX_FAILURES_PER_EMAIL'],
+                max_client_failures=config['LOGIN_MAX_FAILURES_PER_CLIENT'],
+                max_ip_failures=config['LOGIN_MAX_FAILURES_PER_IP']
+            )
+            current_app.extensions['login_throttle'] = throttle
+    return throttle
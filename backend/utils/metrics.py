@@ -0,0 +1,229 @@
+import math
+import time
+import shutil
+import bisect
+import weakref
+import threading
+from flask import Response, g, request, current_app
+from .event_hub import event_hub
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class MetricsRegistry:
+    """
+    Counters and histograms for the /metrics endpoint, kept lock-light: each
+    thread updates its own shard of values without locking, and a scrape
+    adds the shards up. The lock is only taken when a thread records its
+    first value, when it exits and its shard is folded into the shared
+    totals, and when a scrape copies the shards. Values are per process:
+    with several workers, scrape each one or aggregate upstream.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}
+        self._metrics = []
+        self._gauges = []
+
+    def _shard(self):
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = {}
+            # Only the thread-local holds the owner: it is collected when the
+            # thread exits (e.g. the thread-per-request development server)
+            owner = self._local.owner = _ShardOwner()
+            weakref.finalize(owner, self._retire, shard)
+            with self._lock:
+                self._shards[id(shard)] = shard
+        return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            for key, value in shard.items():
+                self._retired[key] = self._retired.get(key, 0) + value
+            del self._shards[id(shard)]
+
+    def add(self, key, amount):
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, collect):
+        """Gauge read at scrape time; collect() returns [(labels dict, value)]"""
+        self._gauges.append((name, documentation, collect))
+
+    def totals(self):
+        with self._lock:
+            shards = list(self._shards.values())
+            totals = dict(self._retired)
+        for shard in shards:
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        totals = self.totals()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(totals))
+        for name, documentation, collect in self._gauges:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in collect():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+class _ShardOwner:
+    pass
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        registry.register(self)
+
+    def inc(self, *labelvalues, amount=1):
+        self.registry.add((self.name, labelvalues), amount)
+
+    def render(self, totals):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key in sorted(key for key in totals if key[0] == self.name):
+            labels = dict(zip(self.labelnames, key[1]))
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(totals[key])}")
+        return lines
+
+class Histogram:
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets) + (math.inf,)
+        registry.register(self)
+
+    def observe(self, value, *labelvalues):
+        # One bucket per observation; cumulative counts are built at scrape
+        index = bisect.bisect_left(self.buckets, value)
+        self.registry.add((self.name, labelvalues, index), 1)
+        self.registry.add((self.name + '_sum', labelvalues), value)
+
+    def render(self, totals):
+        series = {}
+        sums = {}
+        for key, value in totals.items():
+            if key[0] == self.name:
+                series.setdefault(key[1], [0] * len(self.buckets))[key[2]] += value
+            elif key[0] == self.name + '_sum':
+                sums[key[1]] = value
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues in sorted(series):
+            labels = dict(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series[labelvalues]):
+                cumulative += count
+                bucket_labels = dict(labels, le=_format_value(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(sums.get(labelvalues, 0.0))}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = Histogram(
+    registry, 'http_request_duration_seconds', 'Time to build the response of a request.',
+    ('blueprint', 'endpoint', 'method', 'status')
+)
+REQUESTS_STARTED = Counter(registry, 'http_requests_started_total', 'Requests received.', ('blueprint',))
+REQUESTS_FINISHED = Counter(registry, 'http_requests_finished_total', 'Requests answered.', ('blueprint',))
+UPLOAD_BYTES = Counter(registry, 'file_upload_bytes_total', 'File content bytes received.')
+DOWNLOAD_BYTES = Counter(
+    registry, 'file_download_bytes_total',
+    'File content bytes sent; "offload" counts files handed to the front proxy.', ('mode',)
+)
+PASSWORD_HASH_LATENCY = Histogram(
+    registry, 'password_hash_duration_seconds', 'bcrypt time including the wait for a pool worker.',
+    ('operation',), buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+
+def init_metrics(app):
+    """Time every request and serve the registry at /metrics"""
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_in_flight = True
+        REQUESTS_STARTED.inc(request.blueprint or '')
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                request.blueprint or '', request.endpoint or '', request.method, str(response.status_code)
+            )
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        if g.pop('metrics_in_flight', False):
+            REQUESTS_FINISHED.inc(request.blueprint or '')
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f"Bearer {token}":
+            return {'message': 'Unauthorized'}, 401
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+def _in_flight():
+    totals = registry.totals()
+    blueprints = {}
+    for key, value in totals.items():
+        if key[0] == REQUESTS_STARTED.name:
+            blueprints[key[1]] = blueprints.get(key[1], 0) + value
+        elif key[0] == REQUESTS_FINISHED.name:
+            blueprints[key[1]] = blueprints.get(key[1], 0) - value
+    return [({'blueprint': labelvalues[0]}, count) for labelvalues, count in sorted(blueprints.items())]
+
+def _pool_usage():
+    pool = current_app.extensions['sqlalchemy'].engine.pool
+    usage = []
+    for state in ('size', 'checkedout', 'overflow', 'checkedin'):
+        # Only QueuePool reports all of these
+        reader = getattr(pool, state, None)
+        if reader is not None:
+            usage.append(({'state': state}, reader()))
+    return usage
+
+def _upload_folder_free():
+    return [({}, shutil.disk_usage(current_app.config['UPLOAD_FOLDER']).free)]
+
+registry.gauge('http_requests_in_flight', 'Requests being handled.', _in_flight)
+registry.gauge('db_pool_connections', 'Database connection pool usage.', _pool_usage)
+registry.gauge('upload_folder_free_bytes', 'Free disk space in UPLOAD_FOLDER.', _upload_folder_free)
+registry.gauge('event_stream_connections', 'Open Server-Sent Events streams in this process.',
+               lambda: [({}, event_hub.connection_count())])
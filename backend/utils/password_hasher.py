@@ -0,0 +1,125 @@
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+from .metrics import PASSWORD_HASH_LATENCY
+
+# bcrypt only looks at the first 72 bytes; newer releases raise instead of
+# truncating, so cut here to keep verifying hashes made by older ones
+MAX_PASSWORD_BYTES = 72
+
+class PasswordHasherBusy(ServiceUnavailable):
+    description = "Le service d'authentification est surchargé, réessayez dans un instant"
+
+def _password_bytes(password):
+    if isinstance(password, str):
+        password = password.encode('utf-8')
+    return password[:MAX_PASSWORD_BYTES]
+
+# Run in the worker processes: keep them importable and free of app state
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def _check(password, password_hash):
+    try:
+        return bcrypt.checkpw(password, password_hash)
+    except ValueError:
+        # Malformed stored hash
+        return False
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a small process pool so a burst of logins can't tie up
+    every request thread. At most `workers + queue_depth` calls are admitted
+    at once; past that callers get PasswordHasherBusy (503 + Retry-After)
+    immediately instead of queueing behind seconds of hashing.
+    With workers=0 the hash runs on the calling thread, still bounded.
+    """
+
+    def __init__(self, workers, queue_depth, timeout, retry_after):
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(1, workers + queue_depth))
+        self._executor = None
+        if workers > 0:
+            # Forking a threaded server can deadlock the child: spawn instead
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(retry_after=self.retry_after)
+        started = time.perf_counter()
+
+        def release(_future=None):
+            self._slots.release()
+            PASSWORD_HASH_LATENCY.observe(time.perf_counter() - started, fn.__name__.lstrip('_'))
+
+        if self._executor is None:
+            try:
+                return fn(*args)
+            finally:
+                release()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            release()
+            raise
+        # The slot stays taken until the worker is done with the call, even
+        # if the caller stopped waiting for it
+        future.add_done_callback(release)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Still queued: free its slot now rather than after the hash
+            future.cancel()
+            raise PasswordHasherBusy(retry_after=self.retry_after)
+
+    def hash(self, password, rounds):
+        return self._run(_hash, _password_bytes(password), rounds)
+
+    def check(self, password_hash, password):
+        if not password or not password_hash:
+            return False
+        return self._run(_check, _password_bytes(password), password_hash.encode('utf-8'))
+
+_hasher_lock = threading.Lock()
+
+def get_password_hasher():
+    hasher = current_app.extensions.get('password_hasher')
+    if hasher is not None:
+        return hasher
+    with _hasher_lock:
+        hasher = current_app.extensions.get('password_hasher')
+        if hasher is None:
+            config = current_app.config
+            hasher = PasswordHasher(
+                workers=config['PASSWORD_HASH_WORKERS'],
+                queue_depth=config['PASSWORD_HASH_QUEUE_DEPTH'],
+                timeout=config['PASSWORD_HASH_TIMEOUT'],
+                retry_after=config['PASSWORD_HASH_RETRY_AFTER']
+            )
+            current_app.extensions['password_hasher'] = hasher
+    return hasher
+
+def hash_password(password):
+    """bcrypt hash of password at the configured BCRYPT_LOG_ROUNDS"""
+    if not password:
+        raise ValueError('Password must be non-empty.')
+    return get_password_hasher().hash(password, current_app.config['BCRYPT_LOG_ROUNDS'])
+
+def check_password(password_hash, password):
+    return get_password_hasher().check(password_hash, password)
+
+def needs_rehash(password_hash):
+    """True when a hash was made with a cost other than BCRYPT_LOG_ROUNDS"""
+    try:
+        rounds = int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return True
+    return rounds != current_app.config['BCRYPT_LOG_ROUNDS']
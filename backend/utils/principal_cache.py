@@ -0,0 +1,99 @@
+import threading
+from collections import namedtuple
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from models import db, User
+from .lru_cache import TTLCache
+
+# Immutable snapshot of the authenticated user handed to protected views
+Principal = namedtuple('Principal', 'id email display_name role status')
+
+PENDING_INVALIDATIONS_KEY = 'pending_principal_invalidations'
+
+class PrincipalCache:
+    """
+    TTL'd LRU of Principal snapshots keyed by (user_id, token iat).
+    Every user has a generation number; bumping it makes all of that user's
+    entries stale at once without scanning the cache. The TTL bounds how long
+    a change committed by another process can go unnoticed.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generations = {}
+
+    def get(self, user_id, issued_at):
+        entry = self._entries.get((user_id, issued_at))
+        if entry and entry[0] == self.generation(user_id):
+            return entry[1]
+        return None
+
+    def generation(self, user_id):
+        return self._generations.get(user_id, 0)
+
+    def set(self, user_id, issued_at, principal, generation):
+        """Store a principal read while `generation` was current; if the
+        user was invalidated since, the entry is already stale"""
+        self._entries.set((user_id, issued_at), (generation, principal))
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+def get_principal_cache():
+    cache = current_app.extensions.get('principal_cache')
+    if cache is None:
+        cache = PrincipalCache(
+            maxsize=current_app.config['PRINCIPAL_CACHE_SIZE'],
+            ttl=current_app.config['PRINCIPAL_CACHE_TTL']
+        )
+        current_app.extensions['principal_cache'] = cache
+    return cache
+
+def get_principal(user_id, issued_at):
+    """Principal for a verified token, from the cache or one User lookup"""
+    cache = get_principal_cache()
+    principal = cache.get(user_id, issued_at)
+    if principal is not None:
+        return principal
+
+    # Taken before the read: a change committed meanwhile bumps it past this
+    generation = cache.generation(user_id)
+    user = User.query.get(user_id)
+    if not user:
+        return None
+    principal = Principal(user.id, user.email, user.display_name, user.role, user.status)
+    cache.set(user_id, issued_at, principal, generation)
+    return principal
+
+# Drop cached principals once a change to a user's role or status, or its
+# deletion, is committed. Bulk query deletes bypass this: call clear() instead.
+@event.listens_for(db.session, 'after_flush')
+def _collect_user_changes(session, flush_context):
+    changed = set()
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in ('email', 'display_name', 'role', 'status')):
+                changed.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    if changed:
+        session.info.setdefault(PENDING_INVALIDATIONS_KEY, set()).update(changed)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_principals(session):
+    user_ids = session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+    if user_ids and has_app_context():
+        cache = get_principal_cache()
+        for user_id in user_ids:
+            cache.invalidate(user_id)
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop(PENDING_INVALIDATIONS_KEY, None)
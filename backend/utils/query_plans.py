@@ -0,0 +1,161 @@
+import re
+from datetime import datetime
+from types import SimpleNamespace
+import click
+from sqlalchemy import event
+from models import db, File
+from .pagination import encode_cursor
+
+FULL_SCAN = 'full scan'
+INDEX_SCAN = 'full index scan'
+TEMP_SORT = 'temp B-tree sort'
+
+# SQLite: "SCAN files" reads the table and "SCAN files USING [COVERING]
+# INDEX ..." the whole index; only "SEARCH" narrows to a range
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+_SQLITE_INDEX_SCAN = re.compile(r'^SCAN (\w+) USING (?:COVERING )?INDEX ')
+_SQLITE_TEMP_SORT = re.compile(r'^USE TEMP B-TREE ')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+_POSTGRES_SORT = re.compile(r'^(?:->\s+)?(?:Incremental )?Sort\b')
+
+def _hot_paths():
+    """
+    (name, callable, allowed finding kinds) for the queries run on every
+    listing, share and ACL check
+    """
+    from services.file_service import FileService, FILE_SORT_COLUMNS
+    from services.acl_service import ACLService
+    from services.change_log_service import ChangeLogService
+    from services.user_service import UserService, USER_SORT_COLUMNS
+    from .decorators import get_share_permissions
+    from .token_revocation import get_revocation_list
+
+    user_id = 1
+    file_ids = [1, 2, 3]
+    cursor_values = {'name': 'a', 'size': 1, 'created_at': datetime(2000, 1, 1), 'type': 'text/plain',
+                     'email': 'a@inpt.ma'}
+    stub_file = SimpleNamespace(id=1, acl_version=-1, created_at=None)
+    shared_file = File(id=1, name='a', owner_id=user_id, is_shared=True, size=0,
+                       created_at=datetime(2000, 1, 1))
+
+    paths = [
+        ('FileService.get_user_files', lambda: FileService.get_user_files(user_id), ()),
+        ('FileService.get_shared_files', lambda: FileService.get_shared_files(user_id), ()),
+        ('FileService.get_viewable_files', lambda: FileService.get_viewable_files(user_id, file_ids), ()),
+        ('FileService.serialize_files', lambda: FileService.serialize_files([shared_file]), ()),
+        ('ACLService.load_shared_users(file_ids)', lambda: ACLService.load_shared_users(file_ids), ()),
+        ('ACLService.load_shared_users(owner_id)', lambda: ACLService.load_shared_users(owner_id=user_id), ()),
+        ('ACLService.get_shared_users_batch', lambda: ACLService.get_shared_users_batch(user_id, file_ids), ()),
+        ('decorators.get_share_permissions', lambda: get_share_permissions(user_id, stub_file), ()),
+        ('ChangeLogService.get_changes', lambda: ChangeLogService.get_changes(user_id, cursor=1), ()),
+        ('ChangeLogService.get_changes(reset)', lambda: ChangeLogService.get_changes(user_id), ()),
+        # Sorts the candidates of the full-text index, at most 2 * SEARCH_CANDIDATES rows
+        ('UserService.search_users', lambda: UserService.search_users('ab', user_id), {TEMP_SORT}),
+        ('RevocationList.is_revoked', lambda: get_revocation_list().is_revoked('0' * 36), ()),
+    ]
+    # Listings are checked from a cursor: a first page walks its index from
+    # the start, which is a full index scan in the plan but stops at the limit
+    for sort in USER_SORT_COLUMNS:
+        cursor = encode_cursor(sort, cursor_values[sort], 1)
+        paths.append((
+            f'UserService.list_users({sort})',
+            lambda sort=sort, cursor=cursor: UserService.list_users(sort=sort, cursor=cursor),
+            ()
+        ))
+    for scope in ('owned', 'shared'):
+        for sort in FILE_SORT_COLUMNS:
+            cursor = encode_cursor(sort, cursor_values[sort], 1)
+            paths.append((
+                f'FileService.list_files({scope}, {sort})',
+                lambda scope=scope, sort=sort, cursor=cursor: FileService.list_files(
+                    user_id, scope=scope, sort=sort, cursor=cursor),
+                ()
+            ))
+    return paths
+
+def _capture(fn):
+    """Statements and parameters executed by fn()"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return statements
+
+def _plan_findings(statement, parameters):
+    """
+    What a statement does that doesn't scale with the table: (kind, table)
+    for full scans of application tables, full index scans, and sorts in a
+    temporary B-tree (table None). Returns: (findings, plan lines)
+    """
+    tables = set(db.metadata.tables)
+    connection = db.session.connection()
+    findings = []
+    if connection.dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        for line in plan:
+            for kind, pattern in ((FULL_SCAN, _SQLITE_SCAN), (INDEX_SCAN, _SQLITE_INDEX_SCAN)):
+                match = pattern.match(line)
+                if match and match.group(1) in tables:
+                    findings.append((kind, match.group(1)))
+            if _SQLITE_TEMP_SORT.match(line):
+                findings.append((TEMP_SORT, None))
+    elif connection.dialect.name == 'postgresql':
+        # Small tables are scanned by choice; only report scans with no index to use
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+        plan = [row[0] for row in rows]
+        for line in plan:
+            match = _POSTGRES_SCAN.search(line)
+            if match and match.group(1) in tables:
+                findings.append((FULL_SCAN, match.group(1)))
+            if _POSTGRES_SORT.match(line.strip()):
+                findings.append((TEMP_SORT, None))
+    else:
+        raise click.ClickException(f"No query plan check for {connection.dialect.name}")
+    return findings, plan
+
+def describe_findings(findings):
+    return ', '.join(f"{kind} of {table}" if table else kind for kind, table in dict.fromkeys(findings))
+
+def check_query_plans(verbose=False):
+    """
+    EXPLAIN every statement of the hot paths against the current schema.
+    Nothing is written; the transaction is rolled back.
+    Returns: [(path name, statement, findings, plan)] of the regressions
+    """
+    failures = []
+    try:
+        for name, fn, allowed in _hot_paths():
+            for statement, parameters in _capture(fn):
+                findings, plan = _plan_findings(statement, parameters)
+                if verbose:
+                    click.echo(f"{name}\n  {' '.join(statement.split())}\n    " + '\n    '.join(plan))
+                findings = [finding for finding in findings if finding[0] not in allowed]
+                if findings:
+                    failures.append((name, statement, findings, plan))
+    finally:
+        db.session.rollback()
+    return failures
+
+def init_query_plan_check(app):
+    @app.cli.command('check-query-plans')
+    @click.option('--verbose', is_flag=True, help="Print every statement and its plan")
+    def check_query_plans_command(verbose):
+        """Fail if a hot query reads a whole table or index, or sorts its rows"""
+        failures = check_query_plans(verbose)
+        for name, statement, findings, plan in failures:
+            click.echo(f"FAIL {name}: {describe_findings(findings)}", err=True)
+            click.echo(f"  {' '.join(statement.split())}", err=True)
+            click.echo('    ' + '\n    '.join(plan), err=True)
+        if failures:
+            raise SystemExit(1)
+        click.echo("All hot queries read index ranges in order")
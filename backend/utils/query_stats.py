@@ -0,0 +1,145 @@
+import re
+import json
+import time
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Expanded IN lists differ in placeholder count only: fold them into one shape
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(statement):
+    """Statement text with whitespace and IN-list lengths normalized"""
+    return _IN_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+class QueryStats:
+    """Statements run while collecting, with their total time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements[normalize_statement(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statements run at least `threshold` times: the signature of an N+1"""
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+# Collectors opened by assert_max_queries, in addition to the per-request one
+_collectors = []
+
+def _active_collectors():
+    collectors = list(_collectors)
+    if has_request_context():
+        stats = g.get('query_stats')
+        if stats is not None:
+            collectors.append(stats)
+    return collectors
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start_time'].pop()
+    collectors = _active_collectors()
+    if collectors:
+        duration = time.perf_counter() - started
+        for stats in collectors:
+            stats.record(statement, duration)
+
+def _handle_error(exception_context):
+    # after_cursor_execute won't run for a failed statement
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start_time'):
+        conn.info['query_start_time'].pop()
+
+_listening = False
+
+def _listen():
+    global _listening
+    if not _listening:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listening = True
+
+def init_query_stats(app):
+    """
+    Opt-in (SQL_INSTRUMENTATION) per-request statement counting. Adds a
+    Server-Timing header and logs one JSON line per request; statements
+    repeated SQL_N_PLUS_ONE_THRESHOLD times or more are logged as a warning.
+    Queries run while a streamed body is sent are not counted.
+    """
+    if not app.config.get('SQL_INSTRUMENTATION'):
+        return
+    _listen()
+    threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = QueryStats()
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - g.pop('request_started')
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed * 1000:.1f}'
+        )
+
+        repeated = stats.repeated(threshold)
+        line = {
+            'event': 'request_sql',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 1),
+            'total_ms': round(elapsed * 1000, 1),
+        }
+        if repeated:
+            line['repeated'] = [{'statement': statement, 'count': count} for statement, count in repeated]
+            logger.warning(json.dumps(line))
+        else:
+            logger.info(json.dumps(line))
+        return response
+
+@contextmanager
+def count_queries():
+    """Collect every statement run inside the block, request or not"""
+    _listen()
+    stats = QueryStats()
+    _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _collectors.remove(stats)
+
+@contextmanager
+def assert_max_queries(limit):
+    """
+    Fail if the block runs more than `limit` statements, e.g.
+
+        with assert_max_queries(5):
+            client.get('/api/files', headers=headers)
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        details = '\n'.join(f"  {count}x {statement}" for statement, count in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {limit} queries, ran {stats.count}:\n{details}")
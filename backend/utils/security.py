@@ -9,10 +9,15 @@ def generate_secure_token(length=32):
 
 def get_file_hash(file_path):
     """Generate SHA-256 hash of file contents"""
+    return get_files_hash([file_path])
+
+def get_files_hash(file_paths):
+    """Generate SHA-256 hash of the concatenated contents of several files"""
     sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
+    for file_path in file_paths:
+        with open(file_path, "rb") as f:
+            for byte_block in iter(lambda: f.read(4096), b""):
+                sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
 def get_unique_filename(filename):
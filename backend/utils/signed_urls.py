@@ -0,0 +1,64 @@
+import hmac
+import time
+import base64
+import hashlib
+from collections import namedtuple
+from flask import current_app
+from .file_handling import get_blob_path
+
+# Just enough of a File for send_stored_file, rebuilt from the URL alone
+StoredFile = namedtuple('StoredFile', 'id name type size path blob_hash updated_at created_at')
+
+def _signature(file_id, blob_hash, size, name, content_type, expires):
+    key = current_app.config.get('DOWNLOAD_URL_SECRET') or current_app.config['SECRET_KEY']
+    message = '\n'.join(str(part) for part in (file_id, blob_hash, size, name, content_type, expires))
+    digest = hmac.new(key.encode(), message.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+def sign_download(file, ttl=None):
+    """
+    Query parameters of a download URL for `file` that is valid for `ttl`
+    seconds without authentication. The URL is bound to the file id and its
+    content hash, so it stops working as soon as the content changes, but not
+    when a share is revoked: keep the TTL short.
+    """
+    ttl = ttl or current_app.config['SIGNED_URL_TTL']
+    expires = int(time.time()) + ttl
+    content_type = file.type or ''
+    return {
+        'b': file.blob_hash,
+        's': file.size,
+        'n': file.name,
+        't': content_type,
+        'e': expires,
+        'sig': _signature(file.id, file.blob_hash, file.size, file.name, content_type, expires)
+    }
+
+def verify_download(file_id, args):
+    """Check a signed download URL; returns a StoredFile or None"""
+    try:
+        blob_hash = args['b']
+        size = int(args['s'])
+        name = args['n']
+        content_type = args.get('t', '')
+        expires = int(args['e'])
+        signature = args['sig']
+    except (KeyError, ValueError):
+        return None
+
+    if expires < time.time():
+        return None
+    expected = _signature(file_id, blob_hash, size, name, content_type, expires)
+    if not hmac.compare_digest(expected, signature):
+        return None
+
+    return StoredFile(
+        id=file_id,
+        name=name,
+        type=content_type or None,
+        size=size,
+        path=get_blob_path(blob_hash),
+        blob_hash=blob_hash,
+        updated_at=None,
+        created_at=None
+    )
@@ -0,0 +1,107 @@
+import re
+import logging
+import threading
+from collections import deque
+from sqlalchemy import event
+from models import db
+
+logger = logging.getLogger(__name__)
+
+_WRITE_STATEMENT = re.compile(r'^\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE)
+
+class WriteQueue:
+    """
+    First come, first served lock for the single SQLite writer. Waiting
+    threads are woken one at a time in arrival order instead of all
+    polling the database file through the busy handler.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._busy = False
+        self._waiters = deque()
+
+    def acquire(self, timeout):
+        with self._lock:
+            if not self._busy:
+                self._busy = True
+                return True
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        if waiter.wait(timeout):
+            return True
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return False
+        # Handed over between the timeout and the lock
+        return True
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # The lock passes straight to the next writer
+                self._waiters.popleft().set()
+            else:
+                self._busy = False
+
+def init_sqlite_profile(app):
+    """
+    Connection pragmas for SQLite (ignored on other databases): WAL lets
+    readers run alongside the writer, busy_timeout waits for the write lock
+    instead of failing with "database is locked", and writers within the
+    process queue in order for it (SQLITE_SERIALIZE_WRITES). Several worker
+    processes still contend through busy_timeout.
+    """
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    in_memory = engine.url.database in (None, '', ':memory:')
+    config = app.config
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}",
+    ]
+    if not in_memory:
+        pragmas += [
+            "PRAGMA journal_mode = WAL",
+            f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+            f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+        ]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    if in_memory or not config['SQLITE_SERIALIZE_WRITES']:
+        return
+    queue = WriteQueue()
+    timeout = config['SQLITE_BUSY_TIMEOUT'] / 1000
+
+    # A transaction joins the queue at its first write and leaves it when it ends
+    @event.listens_for(engine, 'before_cursor_execute')
+    def queue_writer(conn, cursor, statement, parameters, context, executemany):
+        if 'sqlite_writer' in conn.info or not _WRITE_STATEMENT.match(statement):
+            return
+        if queue.acquire(timeout):
+            conn.info['sqlite_writer'] = True
+        else:
+            # Let SQLite's own busy handler decide rather than block forever
+            logger.warning("SQLite write queue wait exceeded %.1fs", timeout)
+
+    def release_writer(info):
+        if info.pop('sqlite_writer', None):
+            queue.release()
+
+    # Fired just before the COMMIT itself; with WAL and synchronous=NORMAL
+    # it doesn't fsync, so the next writer's wait on busy_timeout is short
+    event.listen(engine, 'commit', lambda conn: release_writer(conn.info))
+    event.listen(engine, 'rollback', lambda conn: release_writer(conn.info))
+    # Connections returned with the transaction still open
+    event.listen(engine.pool, 'checkin', lambda dbapi_connection, record: release_writer(record.info))
@@ -0,0 +1,116 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, RevokedToken
+from .bloom_filter import BloomFilter
+
+# Rows are read again for this long after their created_at: ids and
+# timestamps are assigned at insert, so a row can commit after later ones
+SYNC_OVERLAP = timedelta(minutes=2)
+
+_INSERT_IGNORE = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+class RevocationList:
+    """
+    Revoked token ids, checked on every authenticated request without a
+    database round trip: a Bloom filter answers "not revoked" for almost
+    every token, and only its (rare) positives are confirmed against the
+    revoked_tokens table. Revocations made by other processes are pulled in
+    every `sync_interval` seconds; rows written here are visible at once.
+    """
+
+    def __init__(self, capacity, error_rate, sync_interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, error_rate)
+        self._synced_until = None
+        self._next_sync = 0
+
+    def _sync(self):
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._lock:
+            if now < self._next_sync:
+                return
+            self._next_sync = now + self.sync_interval
+            query = db.session.query(RevokedToken.jti, RevokedToken.created_at)
+            if self._synced_until is None:
+                # First load: tokens that expired are harmless
+                query = query.filter(RevokedToken.expires_at > datetime.utcnow())
+            else:
+                query = query.filter(RevokedToken.created_at > self._synced_until - SYNC_OVERLAP)
+            for jti, created_at in query:
+                # Rows of the overlap are seen again: don't count them twice
+                if jti not in self._filter:
+                    self._filter.add(jti)
+                if created_at and (self._synced_until is None or created_at > self._synced_until):
+                    self._synced_until = created_at
+            if self._filter.count > self.capacity:
+                self._rebuild()
+
+    def _rebuild(self):
+        """Start a fresh filter holding only tokens that haven't expired yet"""
+        fresh = BloomFilter(self.capacity, self.error_rate)
+        jtis = db.session.query(RevokedToken.jti).filter(RevokedToken.expires_at > datetime.utcnow())
+        for (jti,) in jtis:
+            fresh.add(jti)
+        self._filter = fresh
+
+    def is_revoked(self, jti):
+        self._sync()
+        if jti not in self._filter:
+            return False
+        # Possible false positive: confirm with the exact list
+        return db.session.query(RevokedToken.id).filter_by(jti=jti).first() is not None
+
+    def revoke(self, jti, user_id, expires_at):
+        """
+        Add a token to the list; the caller commits. Revoking a token twice
+        is harmless. Returns False if it was already revoked, e.g. by a
+        concurrent request using the same refresh token.
+        """
+        now = datetime.utcnow()
+        RevokedToken.query.filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+        values = {'jti': jti, 'user_id': user_id, 'expires_at': expires_at, 'created_at': now}
+        insert = _INSERT_IGNORE.get(db.session.get_bind().dialect.name)
+        if insert is not None:
+            result = db.session.execute(
+                insert(RevokedToken).values(**values).on_conflict_do_nothing(index_elements=['jti'])
+            )
+            added = result.rowcount == 1
+        else:
+            added = db.session.query(RevokedToken.id).filter_by(jti=jti).first() is None
+            if added:
+                db.session.add(RevokedToken(**values))
+        with self._lock:
+            if jti not in self._filter:
+                self._filter.add(jti)
+        return added
+
+_revocation_lock = threading.Lock()
+
+def get_revocation_list():
+    revocations = current_app.extensions.get('revocation_list')
+    if revocations is not None:
+        return revocations
+    with _revocation_lock:
+        revocations = current_app.extensions.get('revocation_list')
+        if revocations is None:
+            config = current_app.config
+            revocations = RevocationList(
+                capacity=config['TOKEN_REVOCATION_CAPACITY'],
+                error_rate=config['TOKEN_REVOCATION_ERROR_RATE'],
+                sync_interval=config['TOKEN_REVOCATION_SYNC_INTERVAL']
+            )
+            current_app.extensions['revocation_list'] = revocations
+    return revocations
+
+def revoke_token(payload):
+    """Revoke a decoded JWT until it would have expired; False if it already was"""
+    expires_at = datetime.utcfromtimestamp(payload['exp'])
+    return get_revocation_list().revoke(payload['jti'], int(payload['sub']), expires_at)
@@ -5,6 +5,8 @@ export const API_ENDPOINTS = {
     login: `${API_URL}/auth/login`,
     register: `${API_URL}/auth/register`,
     me: `${API_URL}/auth/me`,
+    refresh: `${API_URL}/auth/refresh`,
+    logout: `${API_URL}/auth/logout`,
     deleteUser: `${API_URL}/auth/users`,
     init2fa: `${API_URL}/auth/2fa/setup/init`,
     confirm2fa: `${API_URL}/auth/2fa/setup/confirm`,
@@ -17,9 +19,11 @@ export const API_ENDPOINTS = {
     download: (fileId: string) => `${API_URL}/files/${fileId}/download`,
     share: (fileId: string) => `${API_URL}/files/${fileId}/share`,
     revokeShare: (fileId: string, userId: string) => `${API_URL}/files/${fileId}/share/${userId}`,
+    sharedUsers: `${API_URL}/files/shared-users`,
     delete: (fileId: string) => `${API_URL}/files/${fileId}`,
   },
   users: {
+    list: `${API_URL}/users`,
     search: `${API_URL}/users/search`,
   },
 };
@@ -1,5 +1,5 @@
 import { createContext, useContext, useState, ReactNode, useEffect } from "react";
-import axiosInstance from "@/lib/axios";
+import axiosInstance, { storeTokens, clearTokens } from "@/lib/axios";
 import { API_ENDPOINTS } from "@/config/api";
 import { useToast } from "@/hooks/use-toast";
 import { useLocation } from "react-router-dom";
@@ -71,7 +71,7 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
           axiosInstance.defaults.headers.common['Authorization'] = `Bearer ${token}`;
         } catch (err) {
           console.error("Auth check failed:", err);
-          localStorage.removeItem('token');
+          clearTokens();
         } finally {
           setLoading(false);
         }
@@ -109,10 +109,9 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
       }
 
       if (response.status === 200) {
-        const { token, user } = response.data;
-        localStorage.setItem('token', token);
+        const { token, refreshToken, user } = response.data;
+        storeTokens(token, refreshToken);
         setCurrentUser(user);
-        axiosInstance.defaults.headers.common['Authorization'] = `Bearer ${token}`;
         toast({
           title: "Connexion réussie",
           description: "Vous êtes maintenant connecté à votre compte."
@@ -151,10 +150,9 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
       });
 
       if (response.status === 200) {
-        const { token, user } = response.data;
-        localStorage.setItem('token', token);
+        const { token, refreshToken, user } = response.data;
+        storeTokens(token, refreshToken);
         setCurrentUser(user);
-        axiosInstance.defaults.headers.common['Authorization'] = `Bearer ${token}`;
 
         setTwoFactorRequired(false);
         setTempUserId(null);
@@ -206,17 +204,15 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
         password
       });
       
-      const { token, user } = loginResponse.data;
+      const { token, refreshToken, user } = loginResponse.data;
       
-      // S'assurer que le token est bien enregistré avant de continuer
-      localStorage.setItem('token', token);
+      // S'assurer que les tokens sont bien enregistrés avant de continuer
+      // (et ajoutés aux en-têtes par défaut d'axios)
+      storeTokens(token, refreshToken);
       
       // Mettre à jour l'état de l'utilisateur
       setCurrentUser(user);
       
-      // Ajouter le token aux en-têtes par défaut d'axios
-      axiosInstance.defaults.headers.common['Authorization'] = `Bearer ${token}`;
-      
       toast({
         title: "Inscription réussie",
         description: "Votre compte a été créé avec succès."
@@ -243,7 +239,11 @@ export const AuthProvider = ({ children }: AuthProviderProps) => {
     setLoading(true);
     
     try {
-      localStorage.removeItem('token');
+      // Révoque l'access token et le refresh token côté serveur
+      await axiosInstance
+        .post(API_ENDPOINTS.auth.logout, { refreshToken: localStorage.getItem('refreshToken') })
+        .catch((err) => console.error("Logout request failed:", err));
+      clearTokens();
       setCurrentUser(null);
       
       toast({
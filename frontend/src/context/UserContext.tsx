@@ -15,8 +15,10 @@ interface UserContextType {
   users: User[];
   loading: boolean;
   error: string | null;
+  hasMore: boolean;
   searchUsers: (query: string) => Promise<void>;
   refreshUsers: () => Promise<void>;
+  loadMoreUsers: () => Promise<void>;
   deleteUser: (email: string) => Promise<void>;
 }
 
@@ -40,15 +42,27 @@ export const UserProvider = ({ children }: UserProviderProps) => {
   const [error, setError] = useState<string | null>(null);
   const { toast } = useToast();
 
-  const fetchUsers = async (query?: string) => {
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+
+  // Without a query: paginated listing; with one: ranked search (limited)
+  const fetchUsers = async (query?: string, cursor?: string) => {
     setLoading(true);
     setError(null);
     
     try {
-      const response = await axiosInstance.get(API_ENDPOINTS.users.search, {
-        params: query ? { query } : {}
-      });
-      setUsers(response.data.users);
+      if (query) {
+        const response = await axiosInstance.get(API_ENDPOINTS.users.search, {
+          params: { query }
+        });
+        setUsers(response.data.users);
+        setNextCursor(null);
+      } else {
+        const response = await axiosInstance.get(API_ENDPOINTS.users.list, {
+          params: cursor ? { cursor } : {}
+        });
+        setUsers((previous) => (cursor ? [...previous, ...response.data.users] : response.data.users));
+        setNextCursor(response.data.nextCursor);
+      }
     } catch (err: any) {
       const message = err.response?.data?.message || "Failed to fetch users";
       setError(message);
@@ -70,6 +84,12 @@ export const UserProvider = ({ children }: UserProviderProps) => {
     await fetchUsers();
   };
 
+  const loadMoreUsers = async () => {
+    if (nextCursor) {
+      await fetchUsers(undefined, nextCursor);
+    }
+  };
+
   const deleteUser = async (email: string) => {
     setLoading(true);
     setError(null);
@@ -100,8 +120,10 @@ export const UserProvider = ({ children }: UserProviderProps) => {
     users,
     loading,
     error,
+    hasMore: nextCursor !== null,
     searchUsers,
     refreshUsers,
+    loadMoreUsers,
     deleteUser,
   };
 
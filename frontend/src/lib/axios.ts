@@ -12,8 +12,88 @@ if (token) {
   axiosInstance.defaults.headers.common['Authorization'] = `Bearer ${token}`;
 }
 
-export default axiosInstance;
+export const storeTokens = (accessToken: string, refreshToken?: string) => {
+  localStorage.setItem('token', accessToken);
+  if (refreshToken) {
+    localStorage.setItem('refreshToken', refreshToken);
+  }
+  axiosInstance.defaults.headers.common['Authorization'] = `Bearer ${accessToken}`;
+};
+
+export const clearTokens = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refreshToken');
+  delete axiosInstance.defaults.headers.common['Authorization'];
+};
+
+// Les access tokens ne durent que quelques minutes : on les renouvelle
+// avec le refresh token juste avant leur expiration
+const REFRESH_MARGIN_SECONDS = 60;
+let refreshing: Promise<string | null> | null = null;
 
+const tokenExpiresSoon = (accessToken: string) => {
+  try {
+    const payload = JSON.parse(atob(accessToken.split('.')[1].replace(/-/g, '+').replace(/_/g, '/')));
+    return payload.exp * 1000 - Date.now() < REFRESH_MARGIN_SECONDS * 1000;
+  } catch {
+    return false;
+  }
+};
 
+export const refreshAccessToken = (): Promise<string | null> => {
+  const refreshToken = localStorage.getItem('refreshToken');
+  if (!refreshToken) {
+    return Promise.resolve(null);
+  }
+  // Une seule requête de renouvellement à la fois
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${axiosInstance.defaults.baseURL}/auth/refresh`, null, {
+        headers: { Authorization: `Bearer ${refreshToken}` },
+      })
+      .then((response) => {
+        storeTokens(response.data.token, response.data.refreshToken);
+        return response.data.token as string;
+      })
+      .catch(() => {
+        clearTokens();
+        return null;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+};
 
+axiosInstance.interceptors.request.use(async (config) => {
+  if (config.url?.includes('/auth/refresh')) {
+    return config;
+  }
+  const accessToken = localStorage.getItem('token');
+  if (accessToken && tokenExpiresSoon(accessToken)) {
+    const renewed = await refreshAccessToken();
+    if (renewed) {
+      config.headers.Authorization = `Bearer ${renewed}`;
+    }
+  }
+  return config;
+});
+
+axiosInstance.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status === 401 && original && !original._retried && !original.url?.includes('/auth/')) {
+      original._retried = true;
+      const renewed = await refreshAccessToken();
+      if (renewed) {
+        original.headers.Authorization = `Bearer ${renewed}`;
+        return axiosInstance(original);
+      }
+    }
+    return Promise.reject(error);
+  }
+);
 
+export default axiosInstance;
@@ -6,6 +6,8 @@ import { useState, useEffect } from "react";
 import { Button } from "@/components/ui/button";
 import { useToast } from "@/hooks/use-toast";
 import { ShareFileDialog } from "@/components/files/ShareFileDialog";
+import axiosInstance from "@/lib/axios";
+import { API_ENDPOINTS } from "@/config/api";
 
 const Shared = () => {
   const { files, sharedFiles, revokeShare, shareFile } = useFiles();
@@ -18,15 +20,13 @@ const Shared = () => {
   // Files that the user has shared with others
   const mySharedFiles = files.filter(file => file.isShared);
 
-  const fetchSharedUsers = async (fileId: string) => {
+  // One request for any number of files; without ids, all of my shared files
+  const fetchSharedUsers = async (fileIds?: string[]) => {
     try {
-      const response = await fetch(`/api/files/${fileId}/shared-users`);
-      if (!response.ok) {
-        console.error(`Failed to fetch shared users for file ${fileId}`);
-        return;
-      }
-      const data = await response.json();
-      setSharedUsers(prev => ({ ...prev, [fileId]: data.sharedUsers || [] }));
+      const response = await axiosInstance.get(API_ENDPOINTS.files.sharedUsers, {
+        params: fileIds ? { ids: fileIds.join(",") } : {},
+      });
+      setSharedUsers(prev => ({ ...prev, ...(response.data.sharedUsers || {}) }));
     } catch (error) {
       console.error("Error fetching shared users:", error);
     }
@@ -66,7 +66,7 @@ const Shared = () => {
     try {
       await shareFile(fileId, email, permissions);
       // Immediately fetch updated shared users
-      await fetchSharedUsers(fileId);
+      await fetchSharedUsers([fileId]);
     } catch (error) {
       console.error("Error sharing file:", error);
       toast({
@@ -78,20 +78,17 @@ const Shared = () => {
   };
 
   useEffect(() => {
-    // Load shared users for all shared files immediately
+    // Use existing shared users from files first
     mySharedFiles.forEach(file => {
       if (file.sharedUsers) {
-        // Use existing shared users from file first
         setSharedUsers(prev => ({ ...prev, [file.id]: file.sharedUsers }));
       }
-      // Then fetch latest
-      fetchSharedUsers(file.id);
     });
-  }, [mySharedFiles]);
-
-  useEffect(() => {
-    mySharedFiles.forEach(file => fetchSharedUsers(file.id));
-  }, [mySharedFiles, files]); // Add files dependency to refresh when file sharing status changes
+    // Then fetch latest for all shared files in a single request
+    if (mySharedFiles.length > 0) {
+      fetchSharedUsers();
+    }
+  }, [files]); // Refresh when file sharing status changes
 
   return (
     <MainLayout>
@@ -185,10 +182,10 @@ const Shared = () => {
             setShareDialogOpen(open);
             if (!open) {
               // Refresh the users list when dialog closes
-              fetchSharedUsers(selectedFile.id);
+              fetchSharedUsers([selectedFile.id]);
             }
           }}
-          onShare={() => fetchSharedUsers(selectedFile.id)}
+          onShare={() => fetchSharedUsers([selectedFile.id])}
         />
       )}
     </MainLayout>
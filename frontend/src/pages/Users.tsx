@@ -23,7 +23,7 @@ import {
 } from "@/components/ui/dropdown-menu";
 
 const Users = () => {
-  const { users, loading, error, searchUsers, refreshUsers, deleteUser } = useUsers();
+  const { users, loading, error, hasMore, searchUsers, refreshUsers, loadMoreUsers, deleteUser } = useUsers();
   const [searchQuery, setSearchQuery] = useState("");
   const debouncedSearchQuery = useDebounce(searchQuery, 300);
   const { currentUser } = useAuth();
@@ -176,6 +176,13 @@ const Users = () => {
               )}
             </TableBody>
           </Table>
+          {hasMore && !searchQuery && (
+            <div className="flex justify-center py-4">
+              <Button variant="outline" onClick={loadMoreUsers} disabled={loading}>
+                Load more
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </MainLayout>